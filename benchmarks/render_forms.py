@@ -0,0 +1,115 @@
+'''Compares the time it takes to render form field blocks in Django and Jinja2 templates.
+
+Every form holds the same mix of single line, email, checkbox and dropdown
+fields. Three paths are measured for forms with 50, 500 and 5000 fields:
+
+django - {% include_block %} in a Django template, rendering with render_basic.
+jinja2 - {% include_block %} in a Jinja2 template, rendering with render_basic.
+jinja2 templates - render_form_field() of the Jinja2 extension, rendering the
+Jinja2 template of each block.
+
+Usage: python benchmarks/render_forms.py [repeat]
+
+The fragment cache is disabled so every field is rendered on every run.
+'''
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.template.backends.django import DjangoTemplates  # noqa: E402
+from django.template.backends.jinja2 import Jinja2  # noqa: E402
+from wagtail.core.blocks import StreamBlock, StreamValue  # noqa: E402
+
+from wagtailstreamfieldforms.blocks import (  # noqa: E402
+    CheckboxFormFieldBlock,
+    DropdownFormFieldBlock,
+    EmailFormFieldBlock,
+    SingleLineFormFieldBlock,
+)
+from wagtailstreamfieldforms.forms import FormBuilder  # noqa: E402
+from wagtailstreamfieldforms.models import FormFieldFinder  # noqa: E402
+
+
+FIELD_COUNTS = (50, 500, 5000)
+
+DJANGO_SOURCE = '{% load wagtailcore_tags %}{% for block in body %}{% include_block block %}{% endfor %}'
+JINJA2_SOURCE = '{% for block in body %}{% include_block block %}{% endfor %}'
+JINJA2_TEMPLATES_SOURCE = '{% for block in body %}{{ render_form_field(block, form) }}{% endfor %}'
+
+
+class BodyBlock(StreamBlock):
+    singlelinefield = SingleLineFormFieldBlock()
+    emailfield = EmailFormFieldBlock()
+    checkboxfield = CheckboxFormFieldBlock()
+    dropdownfield = DropdownFormFieldBlock()
+
+
+def make_body(count):
+    '''Returns a StreamValue holding count form fields with unique labels.'''
+    body_block = BodyBlock()
+    children = []
+    for i in range(count):
+        value = {'label': 'Field {0}'.format(i), 'help_text': '', 'required': i % 2 == 0}
+        kind = ('singlelinefield', 'emailfield', 'checkboxfield', 'dropdownfield')[i % 4]
+        if kind == 'singlelinefield':
+            value['default_value'] = ''
+        elif kind == 'checkboxfield':
+            value['default_checked'] = False
+        elif kind == 'dropdownfield':
+            value['choices'] = [{'key': str(key), 'description': 'Choice {0}'.format(key)} for key in range(5)]
+            value['allow_multiple_selections'] = False
+        child_block = body_block.child_blocks[kind]
+        children.append((kind, child_block.to_python(value), 'block-{0}'.format(i)))
+    return StreamValue(body_block, children)
+
+
+def make_engines():
+    django_engine = DjangoTemplates({'NAME': 'django', 'DIRS': [], 'APP_DIRS': True, 'OPTIONS': {}})
+    jinja2_engine = Jinja2({
+        'NAME': 'jinja2',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'extensions': [
+                'wagtail.core.jinja2tags.core',
+                'wagtailstreamfieldforms.jinja2tags.forms',
+            ],
+        },
+    })
+    return {
+        'django': django_engine.from_string(DJANGO_SOURCE),
+        'jinja2': jinja2_engine.from_string(JINJA2_SOURCE),
+        'jinja2 templates': jinja2_engine.from_string(JINJA2_TEMPLATES_SOURCE),
+    }
+
+
+def main(repeat=5):
+    settings.WAGTAILSTREAMFIELDFORMS_FRAGMENT_CACHE_SIZE = 0
+    templates = make_engines()
+    print('{0:>7}  {1}'.format('fields', '  '.join('{0:>16}'.format(name) for name in templates)))
+    for count in FIELD_COUNTS:
+        body = make_body(count)
+        fields = list(FormFieldFinder().iter_form_fields(body.stream_block, body))
+        form = FormBuilder(fields).get_form_class()()
+        context = {'body': body, 'form': form}
+        outputs = set()
+        timings = []
+        for template in templates.values():
+            outputs.add(template.render(context))
+            best = min(timeit.repeat(lambda: template.render(context), number=1, repeat=repeat))
+            timings.append('{0:>14.1f}ms'.format(best * 1000))
+        if len(outputs) != 1:
+            raise AssertionError('The templates rendered different HTML for {0} fields.'.format(count))
+        print('{0:>7}  {1}'.format(count, '  '.join(timings)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-17 19:08
+
+from django.db import migrations
+import wagtail.core.blocks
+import wagtail.core.fields
+import wagtail.images.blocks
+import wagtailstreamfieldforms.blocks
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='homepage',
+            name='body',
+            field=wagtail.core.fields.StreamField([('heading', wagtail.core.blocks.CharBlock(form_classname='heading')), ('paragraph', wagtail.core.blocks.RichTextBlock()), ('image', wagtail.images.blocks.ImageChooserBlock()), ('singlelinefield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False)), ('default_value', wagtail.core.blocks.CharBlock(required=False))])), ('multilinefield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False)), ('default_value', wagtail.core.blocks.CharBlock(required=False))])), ('numberfield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False))])), ('emailfield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False))])), ('urlfield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False))])), ('checkboxfield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False)), ('default_checked', wagtail.core.blocks.BooleanBlock(default=False, required=False))])), ('dropdownfield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False)), ('choices', wagtail.core.blocks.ListBlock(wagtailstreamfieldforms.blocks.FieldChoiceBlock)), ('allow_multiple_selections', wagtail.core.blocks.BooleanBlock(default=False, required=False))])), ('radiofield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False)), ('choices', wagtail.core.blocks.ListBlock(wagtailstreamfieldforms.blocks.FieldChoiceBlock))])), ('datefield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False))])), ('datetimefield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False))]))]),
+        ),
+    ]
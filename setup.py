@@ -12,6 +12,10 @@ documentation_extras = [
     'Sphinx>=1.7.1',
 ]
 
+jinja2_extras = [
+    'Jinja2>=2.11,<3.1',
+]
+
 with open(os.path.join(os.path.dirname(__file__), 'README.md')) as readme:
     README = readme.read()
 
@@ -26,6 +30,7 @@ setup(
     install_requires=install_requires,
     extras_require={
         'docs': documentation_extras,
+        'jinja2': jinja2_extras,
     },
     license="MIT",
     description="Streamfield Forms allows you to create a form by including the form fields in the content stream of a Wagtail Page.",
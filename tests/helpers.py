@@ -0,0 +1,36 @@
+import json
+
+from wagtail.core.models import Page
+
+from .models import FormTestPage
+
+
+def field_value(label, required=False, **kwargs):
+    value = {
+        'label': label,
+        'help_text': '',
+        'required': required,
+        'default_value': '',
+    }
+    value.update(kwargs)
+    return value
+
+
+def make_form_test_page(body=None, publish=True, parent=None, **kwargs):
+    '''Creates a FormTestPage below parent or the root page and optionally publishes a revision of it.'''
+    if body is None:
+        body = [
+            {'type': 'heading', 'value': 'Contact'},
+            {'type': 'singlelinefield', 'value': field_value('Name', required=True)},
+            {'type': 'emailfield', 'value': field_value('Email')},
+        ]
+    kwargs.setdefault('title', 'Form Test Page')
+    kwargs.setdefault('slug', 'form-test-page')
+    kwargs.setdefault('live', publish)
+    if parent is None:
+        parent = Page.objects.get(depth=1)
+    page = parent.add_child(instance=FormTestPage(body=json.dumps(body), **kwargs))
+    if publish:
+        page.save_revision().publish()
+        page.refresh_from_db()
+    return page
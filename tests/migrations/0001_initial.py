@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-17 13:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import wagtail.core.blocks
+import wagtail.core.fields
+import wagtailstreamfieldforms.blocks
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('wagtailcore', '0040_page_draft_title'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormTestPage',
+            fields=[
+                ('page_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='wagtailcore.page')),
+                ('body', wagtail.core.fields.StreamField([('heading', wagtail.core.blocks.CharBlock()), ('singlelinefield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('default_value', wagtail.core.blocks.CharBlock(required=False))])), ('emailfield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False))])), ('checkboxfield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('default_checked', wagtail.core.blocks.BooleanBlock(default=False, required=False))])), ('dropdownfield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('choices', wagtail.core.blocks.ListBlock(wagtailstreamfieldforms.blocks.FieldChoiceBlock)), ('allow_multiple_selections', wagtail.core.blocks.BooleanBlock(default=False, required=False))])), ('section', wagtail.core.blocks.StructBlock([('title', wagtail.core.blocks.CharBlock()), ('field', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('default_value', wagtail.core.blocks.CharBlock(required=False))]))]))], blank=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+            bases=('wagtailcore.page',),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-17 13:35
+
+from django.db import migrations
+import wagtail.core.blocks
+import wagtail.core.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formtestpage',
+            name='sidebar',
+            field=wagtail.core.fields.StreamField([('heading', wagtail.core.blocks.CharBlock()), ('quote', wagtail.core.blocks.StructBlock([('text', wagtail.core.blocks.CharBlock()), ('author', wagtail.core.blocks.CharBlock())]))], blank=True),
+        ),
+    ]
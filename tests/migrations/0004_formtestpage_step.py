@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-17 13:53
+
+from django.db import migrations
+import wagtail.core.blocks
+import wagtail.core.fields
+import wagtailstreamfieldforms.blocks
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0003_alter_formtestpage_body'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='formtestpage',
+            name='body',
+            field=wagtail.core.fields.StreamField([('heading', wagtail.core.blocks.CharBlock()), ('singlelinefield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False)), ('default_value', wagtail.core.blocks.CharBlock(required=False))])), ('emailfield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False))])), ('checkboxfield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False)), ('default_checked', wagtail.core.blocks.BooleanBlock(default=False, required=False))])), ('dropdownfield', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False)), ('choices', wagtail.core.blocks.ListBlock(wagtailstreamfieldforms.blocks.FieldChoiceBlock)), ('allow_multiple_selections', wagtail.core.blocks.BooleanBlock(default=False, required=False))])), ('section', wagtail.core.blocks.StructBlock([('title', wagtail.core.blocks.CharBlock()), ('field', wagtail.core.blocks.StructBlock([('label', wagtail.core.blocks.CharBlock()), ('required', wagtail.core.blocks.BooleanBlock(default=False, required=False)), ('help_text', wagtail.core.blocks.CharBlock(required=False)), ('condition_field', wagtail.core.blocks.CharBlock(help_text='Only show this field when the field with this label has the condition value.', required=False)), ('condition_value', wagtail.core.blocks.CharBlock(help_text='Leave empty to show this field when the other field has any value.', required=False)), ('default_value', wagtail.core.blocks.CharBlock(required=False))]))])), ('step', wagtail.core.blocks.StructBlock([('title', wagtail.core.blocks.CharBlock(required=False))]))], blank=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from wagtail.core.blocks import CharBlock, StructBlock
+from wagtail.core.fields import StreamField
+
+from wagtailstreamfieldforms.blocks import (
+    CheckboxFormFieldBlock,
+    DropdownFormFieldBlock,
+    EmailFormFieldBlock,
+    FormStepBlock,
+    ModelDropdownFormFieldBlock,
+    SingleLineFormFieldBlock,
+)
+from wagtailstreamfieldforms.models import AbstractFormPage
+
+
+class FormTestPage(AbstractFormPage):
+    '''Form page used by the test suite.'''
+    body = StreamField([
+        ('heading', CharBlock()),
+        ('singlelinefield', SingleLineFormFieldBlock()),
+        ('emailfield', EmailFormFieldBlock()),
+        ('checkboxfield', CheckboxFormFieldBlock()),
+        ('dropdownfield', DropdownFormFieldBlock()),
+        ('modeldropdownfield', ModelDropdownFormFieldBlock()),
+        ('section', StructBlock([
+            ('title', CharBlock()),
+            ('field', SingleLineFormFieldBlock()),
+        ])),
+        ('step', FormStepBlock()),
+    ], blank=True)
+    sidebar = StreamField([
+        ('heading', CharBlock()),
+        ('quote', StructBlock([
+            ('text', CharBlock()),
+            ('author', CharBlock()),
+        ])),
+    ], blank=True)
@@ -1,5 +1,5 @@
 from django import forms
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 
 from wagtailstreamfieldforms.blocks import (
@@ -15,6 +15,9 @@ from wagtailstreamfieldforms.blocks import (
     DateFormFieldBlock,
     DateTimeFormFieldBlock,
 )
+from wagtailstreamfieldforms.cache import fragment_cache
+
+from .helpers import field_value, make_form_test_page
 
 
 class TestFormFieldBlockMixin(TestCase):
@@ -275,3 +278,43 @@ class TestDateTimeFormFieldBlock(TestCase):
         self.assertIsInstance(field, forms.DateTimeField)
 
 
+
+
+@override_settings(WAGTAILSTREAMFIELDFORMS_FRAGMENT_CACHE_SIZE=10)
+class TestFragmentCache(TestCase):
+
+    def setUp(self):
+        fragment_cache.clear()
+        self.page = make_form_test_page(body=[
+            {'type': 'singlelinefield', 'value': field_value('Name', required=True)},
+            {'type': 'checkboxfield', 'value': field_value('Agree', default_checked=False)},
+        ])
+        self.block = self.page.body[0]
+
+    def test_unbound_render_is_cached(self):
+        html = self.block.render({'form': self.page.get_form()})
+        self.assertEqual(len(fragment_cache), 1)
+        self.assertEqual(self.block.render({'form': self.page.get_form()}), html)
+        self.assertEqual(fragment_cache.hits, 1)
+        self.assertIn('name="name"', html)
+
+    def test_checkbox_render(self):
+        html = self.page.body[1].render({'form': self.page.get_form()})
+        self.assertTrue(html.startswith('<div class="checkboxformfieldblock"><input type="checkbox"'))
+
+    def test_bound_render_is_not_cached(self):
+        form = self.page.get_form({'name': ''})
+        form.is_valid()
+        html = self.block.render({'form': form})
+        self.assertEqual(len(fragment_cache), 0)
+        self.assertIn('errorlist', str(form['name'].errors))
+        self.assertIn('name="name"', html)
+
+    def test_initial_data_is_not_cached(self):
+        self.block.render({'form': self.page.get_form(initial={'name': 'Bob'})})
+        self.assertEqual(len(fragment_cache), 0)
+
+    @override_settings(WAGTAILSTREAMFIELDFORMS_FRAGMENT_CACHE_SIZE=0)
+    def test_disabled_by_default(self):
+        self.block.render({'form': self.page.get_form()})
+        self.assertEqual(len(fragment_cache), 0)
@@ -0,0 +1,131 @@
+import json
+
+from django.test import TestCase, override_settings
+
+from wagtailstreamfieldforms.cache import LRUCache, content_form_class_cache, form_class_cache
+
+from .helpers import field_value, make_form_test_page
+
+
+class TestLRUCache(TestCase):
+
+    def test_get_and_set(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_callable_maxsize(self):
+        size = [1]
+        cache = LRUCache(lambda: size[0])
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(len(cache), 1)
+        size[0] = 3
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_delete_matching(self):
+        cache = LRUCache(10)
+        cache.set((1, 1), 'a')
+        cache.set((1, 2), 'b')
+        cache.set((2, 1), 'c')
+        cache.delete_matching(lambda key: key[0] == 1)
+        self.assertEqual(len(cache), 1)
+        self.assertIn((2, 1), cache)
+
+
+class TestFormClassCache(TestCase):
+
+    def setUp(self):
+        form_class_cache.clear()
+        content_form_class_cache.clear()
+
+    def test_form_class_is_cached(self):
+        page = make_form_test_page()
+        form_class_cache.clear()
+        form_cls = page.get_form_class()
+        self.assertIs(page.get_form_class(), form_cls)
+        self.assertIn((page.pk, page.live_revision_id), form_class_cache)
+        self.assertEqual(form_class_cache.hits, 1)
+        self.assertEqual(form_class_cache.misses, 1)
+
+    def test_unpublished_page_is_not_cached(self):
+        page = make_form_test_page(publish=False)
+        page.get_form_class()
+        self.assertIsNone(page.get_form_class_cache_key())
+        self.assertEqual(len(form_class_cache), 0)
+
+    def test_preview_is_not_cached(self):
+        page = make_form_test_page()
+        page.is_form_preview = True
+        self.assertIsNone(page.get_form_class_cache_key())
+
+    def test_publish_invalidates_cache(self):
+        page = make_form_test_page()
+        page.get_form_class()
+        old_key = (page.pk, page.live_revision_id)
+        page.body = '[{"type": "singlelinefield", "value": %s}]' % (
+            '{"label": "Other", "help_text": "", "required": false, "default_value": ""}'
+        )
+        page.save_revision().publish()
+        page.refresh_from_db()
+        self.assertNotIn(old_key, form_class_cache)
+        self.assertEqual(list(page.get_form_class().base_fields), ['other'])
+
+    def test_unpublish_invalidates_cache(self):
+        page = make_form_test_page()
+        page.get_form_class()
+        page.unpublish()
+        self.assertEqual(len(form_class_cache), 0)
+
+    @override_settings(WAGTAILSTREAMFIELDFORMS_FORM_CLASS_CACHE_SIZE=1)
+    def test_size_setting(self):
+        first = make_form_test_page()
+        second = make_form_test_page(slug='second')
+        first.get_form_class()
+        second.get_form_class()
+        self.assertEqual(len(form_class_cache), 1)
+        self.assertIn((second.pk, second.live_revision_id), form_class_cache)
+
+    def test_publish_reuses_unchanged_fields(self):
+        page = make_form_test_page()
+        old_cls = page.get_form_class()
+        body = page.body.get_prep_value()
+        body[2]['value']['label'] = 'Email Address'
+        page.body = json.dumps(body)
+        page.save_revision().publish()
+        page.refresh_from_db()
+        self.assertIn((page.pk, page.live_revision_id), form_class_cache)
+        form_cls = page.get_form_class()
+        self.assertEqual(list(form_cls.base_fields), ['name', 'email-address'])
+        self.assertIs(form_cls.base_fields['name'], old_cls.base_fields['name'])
+
+
+    def test_publish_reuses_fields_of_shared_form_class(self):
+        first = make_form_test_page()
+        page = make_form_test_page(slug='second')
+        old_cls = page.get_form_class()
+        self.assertIs(old_cls, first.get_form_class())
+        body = page.body.get_prep_value()
+        body[2]['value']['label'] = 'Email Address'
+        page.body = json.dumps(body)
+        page.save_revision().publish()
+        page.refresh_from_db()
+        form_cls = page.get_form_class()
+        self.assertEqual(list(form_cls.base_fields), ['name', 'email-address'])
+        self.assertIs(form_cls.base_fields['name'], old_cls.base_fields['name'])
+        self.assertEqual(set(key[1] for key in page.get_page_form().field_sources), {'name', 'email-address'})
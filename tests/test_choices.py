@@ -0,0 +1,184 @@
+from django import forms
+from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache import cache
+from django.db.migrations.writer import MigrationWriter
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from wagtailstreamfieldforms.blocks import ModelDropdownFormFieldBlock
+from wagtailstreamfieldforms.cache import fragment_cache
+from wagtailstreamfieldforms.choices import (
+    ChoiceSourceRegistry,
+    ModelChoiceSource,
+    choicesources,
+    get_choice_source_choices,
+)
+
+from .helpers import field_value, make_form_test_page
+
+
+groups = ModelChoiceSource(Group, label_field='name', queryset=lambda: Group.objects.order_by('pk'), autocomplete=True)
+choicesources.register('groups', groups, label='Groups')
+choicesources.register('private-groups', ModelChoiceSource(Group, label_field='name'), label='Private Groups')
+
+
+class ChoiceSourceTestCase(TestCase):
+
+    def setUp(self):
+        Group.objects.all().delete()
+        self.red = Group.objects.create(name='Red')
+        self.green = Group.objects.create(name='Green')
+        self.blue = Group.objects.create(name='Blue')
+
+
+class TestModelChoiceSource(ChoiceSourceTestCase):
+
+    def test_choices_are_cached(self):
+        self.assertEqual(groups.get_labels([self.green.pk, self.red.pk]), [
+            (str(self.red.pk), 'Red'),
+            (str(self.green.pk), 'Green'),
+        ])
+        with self.assertNumQueries(0):
+            self.assertEqual(len(groups.get_choices()), 3)
+            self.assertIn(str(self.blue.pk), groups.get_keys())
+
+    def test_invalidated_on_save_and_delete(self):
+        groups.get_choices()
+        yellow = Group.objects.create(name='Yellow')
+        self.assertIn(str(yellow.pk), groups.get_keys())
+        yellow.delete()
+        self.assertEqual(len(groups.get_choices()), 3)
+
+    @override_settings(WAGTAILSTREAMFIELDFORMS_CHOICE_CACHE_TIMEOUT=0)
+    def test_timeout(self):
+        groups.get_choices()
+        with self.assertNumQueries(1):
+            groups.get_choices()
+
+    def test_search(self):
+        self.assertEqual(groups.search('e', limit=2), ([(str(self.red.pk), 'Red'), (str(self.green.pk), 'Green')], True))
+        self.assertEqual(groups.search('E', offset=2, limit=2), ([(str(self.blue.pk), 'Blue')], False))
+
+    def test_registry(self):
+        registry = ChoiceSourceRegistry()
+        registry.register('groups', groups, label='Groups')
+        self.assertIs(registry.lookup('groups'), groups)
+        self.assertEqual(registry.get_block_choices(), [('groups', 'Groups')])
+        with self.assertRaises(ValueError):
+            registry.register('groups', groups)
+
+
+class TestModelDropdownFormFieldBlock(ChoiceSourceTestCase):
+
+    def make_value(self, **kwargs):
+        block = ModelDropdownFormFieldBlock()
+        kwargs.setdefault('choice_source', 'groups')
+        return block, block.to_python(field_value('Group', **kwargs))
+
+    def test_single_selection(self):
+        block, value = self.make_value()
+        field = block.create_field(value)
+        self.assertIsInstance(field, forms.ChoiceField)
+        self.assertEqual(field.clean(str(self.red.pk)), str(self.red.pk))
+        with self.assertRaises(forms.ValidationError):
+            field.clean('0')
+        self.assertIn('>Blue</option>', field.widget.render('group', None))
+
+    def test_multiple_selection(self):
+        block, value = self.make_value(allow_multiple_selections=True)
+        field = block.create_field(value)
+        self.assertIsInstance(field, forms.MultipleChoiceField)
+        self.assertEqual(field.clean([str(self.red.pk), str(self.blue.pk)]), [str(self.red.pk), str(self.blue.pk)])
+
+    def test_choices_follow_source(self):
+        block, value = self.make_value()
+        field = block.create_field(value)
+        yellow = Group.objects.create(name='Yellow')
+        self.assertEqual(field.clean(str(yellow.pk)), str(yellow.pk))
+        self.assertIn('>Yellow</option>', field.widget.render('group', None))
+
+    def test_autocomplete_renders_selected_choices(self):
+        block, value = self.make_value(autocomplete=True)
+        field = block.create_field(value)
+        html = field.widget.render('group', str(self.green.pk))
+        url = reverse('wagtailstreamfieldforms:choice_source', args=('groups',))
+        self.assertIn('data-autocomplete-url="%s"' % url, html)
+        self.assertIn('>Green</option>', html)
+        self.assertNotIn('>Red</option>', html)
+        self.assertEqual(field.clean(str(self.red.pk)), str(self.red.pk))
+
+    def test_autocomplete_not_allowed_by_source(self):
+        block, value = self.make_value(choice_source='private-groups', autocomplete=True)
+        field = block.create_field(value)
+        html = field.widget.render('group', str(self.green.pk))
+        self.assertNotIn('data-autocomplete-url', html)
+        self.assertIn('>Red</option>', html)
+        schema = block.get_field_schema(value, field)
+        self.assertIsNone(schema['choices_url'])
+        self.assertFalse(schema['autocomplete'])
+        self.assertEqual(schema['choices'], [
+            [str(self.red.pk), 'Red'],
+            [str(self.green.pk), 'Green'],
+            [str(self.blue.pk), 'Blue'],
+        ])
+
+    def test_choice_source_choices_in_migrations(self):
+        block = ModelDropdownFormFieldBlock()
+        string, imports = MigrationWriter.serialize(block)
+        self.assertIn('wagtailstreamfieldforms.choices.get_choice_source_choices', string)
+        self.assertIn(('groups', 'Groups'), get_choice_source_choices())
+
+    def test_field_schema(self):
+        block, value = self.make_value(autocomplete=True)
+        schema = block.get_field_schema(value, block.create_field(value))
+        self.assertEqual(schema['choice_source'], 'groups')
+        self.assertEqual(schema['choices_url'], reverse('wagtailstreamfieldforms:choice_source', args=('groups',)))
+        self.assertTrue(schema['autocomplete'])
+        self.assertFalse(schema['multiple'])
+        self.assertNotIn('choices', schema)
+
+
+@override_settings(WAGTAILSTREAMFIELDFORMS_FRAGMENT_CACHE_SIZE=10)
+class TestChoiceSourcePage(ChoiceSourceTestCase):
+
+    def setUp(self):
+        super(TestChoiceSourcePage, self).setUp()
+        cache.clear()
+        fragment_cache.clear()
+        self.page = make_form_test_page(body=[
+            {'type': 'modeldropdownfield', 'value': field_value('Group', choice_source='groups')},
+        ])
+        self.page.cache_form_page = True
+        self.page.conditional_form_page = True
+        self.factory = RequestFactory()
+
+    def serve(self):
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        return self.page.serve(request)
+
+    def test_rendered_choices_follow_source(self):
+        self.assertTrue(self.page.uses_choice_sources())
+        self.assertNotIn('>Yellow</option>', self.serve().content.decode())
+        Group.objects.create(name='Yellow')
+        response = self.serve()
+        self.assertIn('>Yellow</option>', response.content.decode())
+        self.assertNotIn('ETag', response)
+        self.assertEqual(len(fragment_cache), 0)
+
+    def test_page_cache_and_etag_are_skipped(self):
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        self.assertIsNone(self.page.get_page_cache_key(request))
+        self.assertIsNone(self.page.get_form_page_etag(request))
+
+    def test_schema_choices_follow_source(self):
+        page = make_form_test_page(slug='private', body=[
+            {'type': 'modeldropdownfield', 'value': field_value('Group', choice_source='private-groups')},
+        ])
+        url = reverse('wagtailstreamfieldforms:form_schema', args=(page.pk,))
+        self.assertEqual(len(self.client.get(url).json()['fields'][0]['choices']), 3)
+        yellow = Group.objects.create(name='Yellow')
+        response = self.client.get(url)
+        self.assertNotIn('ETag', response)
+        self.assertIn([str(yellow.pk), 'Yellow'], response.json()['fields'][0]['choices'])
@@ -0,0 +1,77 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase
+from django.utils.http import http_date
+
+from .helpers import field_value, make_form_test_page
+
+
+class TestConditionalGet(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.page = make_form_test_page()
+        self.page.conditional_form_page = True
+
+    def get(self, method='get', **headers):
+        request = getattr(self.factory, method)('/', **headers)
+        request.user = AnonymousUser()
+        return request
+
+    def test_disabled_by_default(self):
+        self.page.conditional_form_page = False
+        self.assertIsNone(self.page.get_form_page_etag(self.get()))
+        self.assertNotIn('ETag', self.page.serve(self.get()))
+
+    def test_validators_are_sent(self):
+        response = self.page.serve(self.get())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], self.page.get_form_page_etag(self.get()))
+        self.assertEqual(response['Last-Modified'], http_date(self.page.get_form_page_last_modified()))
+
+    def test_if_none_match(self):
+        etag = self.page.serve(self.get())['ETag']
+        with self.assertNumQueries(0):
+            response = self.page.serve(self.get(HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        response = self.page.serve(self.get())
+        last_modified, etag = response['Last-Modified'], response['ETag']
+        response = self.page.serve(self.get(HTTP_IF_MODIFIED_SINCE=last_modified, HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_without_etag(self):
+        last_modified = self.page.serve(self.get())['Last-Modified']
+        response = self.page.serve(self.get(HTTP_IF_MODIFIED_SINCE=last_modified, HTTP_COOKIE='csrftoken=' + 'a' * 64))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('name="name"', response.content.decode())
+
+    def test_etag_changes_with_csrf_cookie(self):
+        request = self.get()
+        etag = self.page.get_form_page_etag(request)
+        request.COOKIES['csrftoken'] = 'a' * 64
+        self.assertNotEqual(self.page.get_form_page_etag(request), etag)
+
+    def test_etag_changes_when_published(self):
+        etag = self.page.get_form_page_etag(self.get())
+        self.page.body = '[{"type": "singlelinefield", "value": %s}]' % (
+            '{"label": "Phone", "help_text": "", "required": false, "default_value": ""}',
+        )
+        self.page.save_revision().publish()
+        self.page.refresh_from_db()
+        self.page.conditional_form_page = True
+        response = self.page.serve(self.get(HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('name="phone"', response.content.decode())
+
+    def test_post_is_not_conditional(self):
+        request = self.factory.post('/', {'name': ''}, HTTP_IF_NONE_MATCH='*')
+        request.user = AnonymousUser()
+        self.assertIsNone(self.page.get_form_page_etag(request))
+
+    def test_unpublished_page(self):
+        page = make_form_test_page(body=[{'type': 'singlelinefield', 'value': field_value('Name')}],
+                                   publish=False, slug='draft')
+        page.conditional_form_page = True
+        self.assertIsNone(page.get_form_page_etag(self.get()))
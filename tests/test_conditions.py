@@ -0,0 +1,108 @@
+from django.test import TestCase
+
+from wagtailstreamfieldforms.blocks import CheckboxFormFieldBlock, SingleLineFormFieldBlock
+from wagtailstreamfieldforms.cache import content_form_class_cache
+from wagtailstreamfieldforms.forms import BlockField, FormBuilder, condition_matches
+from wagtailstreamfieldforms.models import Submission
+
+from .helpers import field_value, make_form_test_page
+
+
+def text_field(label, required=False, condition_field='', condition_value=''):
+    return BlockField(SingleLineFormFieldBlock(), field_value(
+        label,
+        required=required,
+        condition_field=condition_field,
+        condition_value=condition_value,
+    ))
+
+
+class TestConditionMatches(TestCase):
+
+    def test_condition_matches(self):
+        self.assertTrue(condition_matches('yes', 'yes'))
+        self.assertFalse(condition_matches('no', 'yes'))
+        self.assertTrue(condition_matches('anything', ''))
+        self.assertFalse(condition_matches('', ''))
+        self.assertTrue(condition_matches(['a', 'b'], 'b'))
+        self.assertTrue(condition_matches(True, 'True'))
+        self.assertTrue(condition_matches(False, 'false'))
+        self.assertFalse(condition_matches(False, ''))
+
+
+class TestFieldConditions(TestCase):
+
+    def setUp(self):
+        content_form_class_cache.clear()
+
+    def test_conditions_and_order(self):
+        builder = FormBuilder([
+            text_field('Details', required=True, condition_field='Kind', condition_value='other'),
+            text_field('More', condition_field='Details'),
+            text_field('Kind'),
+        ])
+        conditions = builder.get_field_conditions()
+        self.assertEqual(conditions, {'details': ('kind', 'other'), 'more': ('details', '')})
+        self.assertEqual(builder.get_validation_order(conditions), ['kind', 'details', 'more'])
+        form_cls = builder.get_form_class()
+        self.assertEqual(form_cls.validation_rules['details']['condition'], {'field': 'kind', 'value': 'other'})
+
+    def test_unknown_fields_and_cycles_are_ignored(self):
+        builder = FormBuilder([
+            text_field('A', condition_field='B'),
+            text_field('B', condition_field='A'),
+            text_field('C', condition_field='Missing'),
+        ])
+        self.assertEqual(builder.get_field_conditions(), {'b': ('a', '')})
+
+    def test_inactive_fields_are_not_validated(self):
+        form_cls = FormBuilder([
+            text_field('Details', required=True, condition_field='Kind', condition_value='other'),
+            text_field('More', required=True, condition_field='Details'),
+            text_field('Kind'),
+        ]).get_form_class()
+
+        form = form_cls({'kind': 'simple', 'details': '', 'more': ''})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data, {'kind': 'simple'})
+        self.assertEqual(form.inactive_fields, {'details', 'more'})
+
+        form = form_cls({'kind': 'other', 'details': '', 'more': ''})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(list(form.errors), ['details'])
+
+        form = form_cls({'kind': 'other', 'details': 'x', 'more': ''})
+        self.assertEqual(list(form.errors), ['more'])
+
+    def test_checkbox_condition(self):
+        checkbox = CheckboxFormFieldBlock()
+        form_cls = FormBuilder([
+            BlockField(checkbox, checkbox.to_python(field_value('Subscribe', default_checked=False))),
+            text_field('Email', required=True, condition_field='Subscribe', condition_value='true'),
+        ]).get_form_class()
+        self.assertTrue(form_cls({}).is_valid())
+        self.assertFalse(form_cls({'subscribe': 'on'}).is_valid())
+
+    def test_inactive_fields_are_not_stored(self):
+        page = make_form_test_page(body=[
+            {'type': 'singlelinefield', 'value': field_value('Kind')},
+            {'type': 'singlelinefield', 'value': field_value(
+                'Details', required=True, condition_field='Kind', condition_value='other')},
+        ])
+        form = page.get_form({'kind': 'simple'})
+        self.assertTrue(form.is_valid())
+        submission = page.process_form_submission(form)
+        self.assertEqual([name for name, value in submission.fields()], ['kind'])
+        self.assertEqual(Submission.objects.count(), 1)
+
+    def test_fields_are_stored_in_form_order(self):
+        page = make_form_test_page(body=[
+            {'type': 'singlelinefield', 'value': field_value('Name')},
+            {'type': 'singlelinefield', 'value': field_value('Details', condition_field='Kind')},
+            {'type': 'singlelinefield', 'value': field_value('Kind')},
+        ])
+        form = page.get_form({'name': 'Bob', 'details': 'Blue', 'kind': 'other'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(list(form.cleaned_data), ['name', 'details', 'kind'])
+        submission = page.process_form_submission(form)
+        self.assertEqual([name for name, value in submission.fields()], ['name', 'details', 'kind'])
@@ -1,11 +1,27 @@
 # -*- coding: utf-8 -*-
+import copy
+
 from django import forms
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from wagtail.core.blocks import StructBlock
 
-from wagtailstreamfieldforms.blocks import FormFieldBlockMixin
-from wagtailstreamfieldforms.forms import FormFieldBlockRegistry, BlockField, FormBuilder
+from wagtailstreamfieldforms.blocks import (
+    DropdownFormFieldBlock,
+    FormFieldBlockMixin,
+    MultiLineFormFieldBlock,
+    SingleLineFormFieldBlock,
+)
+from wagtailstreamfieldforms.cache import content_form_class_cache
+from wagtailstreamfieldforms.forms import (
+    BlockField,
+    FieldSpec,
+    FormBuilder,
+    FormFieldBlockRegistry,
+    IndexedChoiceField,
+    IndexedMultipleChoiceField,
+    LazyFields,
+)
 
 
 class TestFormFieldBlockRegistry(TestCase):
@@ -79,6 +95,71 @@ class TestBlockField(TestCase):
         self.assertEqual(bf.get_field_id(), 'test-block')
 
 
+class CountingFieldBlock(StructBlock, FormFieldBlockMixin):
+    '''Records how often the field options are computed.'''
+    calls = 0
+
+    def get_field_options(self, field):
+        CountingFieldBlock.calls += 1
+        return super(CountingFieldBlock, self).get_field_options(field)
+
+
+class PhoneFieldBlock(StructBlock, FormFieldBlockMixin):
+    '''Overrides create_field with the signature used before the field options were passed in.'''
+    def create_field(self, field):
+        return forms.CharField(label=field['label'], max_length=20)
+
+
+class OptionsFieldBlock(StructBlock, FormFieldBlockMixin):
+    '''Changes the field options it is passed.'''
+    def create_field(self, field, options=None):
+        options['max_length'] = 10
+        return super(OptionsFieldBlock, self).create_field(field, options)
+
+
+class TestFieldSpec(TestCase):
+
+    def test_computed_once(self):
+        CountingFieldBlock.calls = 0
+        bf = BlockField(CountingFieldBlock(), {'label': 'Test Block', 'help_text': '', 'required': True})
+        self.assertEqual(bf.get_field_id(), 'test-block')
+        self.assertIsInstance(bf.get_form_field(), forms.CharField)
+        self.assertEqual(bf.get_field_id(), 'test-block')
+        self.assertEqual(CountingFieldBlock.calls, 1)
+
+    def test_immutable(self):
+        spec = FieldSpec(DropdownFormFieldBlock(), {
+            'label': 'Choice',
+            'help_text': '',
+            'required': False,
+            'choices': [{'key': 'a', 'description': 'A'}],
+            'allow_multiple_selections': False,
+        })
+        self.assertEqual(spec.field_id, 'choice')
+        self.assertEqual(spec.field_type, 'dropdown')
+        self.assertFalse(hasattr(spec, '__dict__'))
+        with self.assertRaises(AttributeError):
+            spec.field_id = 'other'
+        with self.assertRaises(TypeError):
+            spec.options['label'] = 'Other'
+        self.assertIsInstance(spec.create_field(), forms.ChoiceField)
+
+    def test_create_field_without_options(self):
+        spec = FieldSpec(PhoneFieldBlock(), {'label': 'Phone', 'help_text': '', 'required': True})
+        field = spec.create_field()
+        self.assertIsInstance(field, forms.CharField)
+        self.assertEqual(field.max_length, 20)
+
+    def test_create_field_gets_mutable_options(self):
+        spec = FieldSpec(OptionsFieldBlock(), {'label': 'Code', 'help_text': '', 'required': True})
+        self.assertEqual(spec.create_field().max_length, 10)
+        self.assertNotIn('max_length', spec.options)
+
+    def test_unregistered_field_type(self):
+        spec = FieldSpec(TestFieldBlock(), {'label': 'Test Block', 'help_text': '', 'required': True})
+        self.assertIsNone(spec.field_type)
+
+
 class TestFormBuilder(TestCase):
 
     def test_form_fields_property(self):
@@ -108,3 +189,186 @@ class TestFormBuilder(TestCase):
         form = form_cls()
         self.assertIsInstance(form, forms.Form)
         self.assertIsInstance(form['test-block'], forms.BoundField)
+
+
+class TestFormBuilderContentHash(TestCase):
+
+    def setUp(self):
+        content_form_class_cache.clear()
+
+    def make_fields(self, label='Test Block', multiple=False):
+        return [
+            BlockField(TestFieldBlock(), {'label': label, 'help_text': '', 'required': True}),
+            BlockField(DropdownFormFieldBlock(), {
+                'label': 'Choice',
+                'help_text': '',
+                'required': False,
+                'choices': [{'key': 'a', 'description': 'A'}],
+                'allow_multiple_selections': multiple,
+            }),
+        ]
+
+    def test_identical_fields_share_class(self):
+        first = FormBuilder(self.make_fields()).get_form_class()
+        second = FormBuilder(self.make_fields()).get_form_class()
+        self.assertIs(first, second)
+        self.assertEqual(len(content_form_class_cache), 1)
+        self.assertEqual(first.content_hash, FormBuilder(self.make_fields()).get_content_hash())
+
+    def test_different_fields_do_not_share_class(self):
+        first = FormBuilder(self.make_fields()).get_form_class()
+        self.assertIsNot(first, FormBuilder(self.make_fields(label='Other')).get_form_class())
+        self.assertIsNot(first, FormBuilder(self.make_fields(multiple=True)).get_form_class())
+        self.assertEqual(len(content_form_class_cache), 3)
+
+
+class TestFormBuilderPreviousFormClass(TestCase):
+
+    def setUp(self):
+        content_form_class_cache.clear()
+
+    def make_fields(self, second_label):
+        return [
+            BlockField(TestFieldBlock(), {'label': 'First', 'help_text': '', 'required': True}, 'block-1'),
+            BlockField(TestFieldBlock(), {'label': second_label, 'help_text': '', 'required': True}, 'block-2'),
+            BlockField(TestFieldBlock(), {'label': 'Third', 'help_text': '', 'required': True}),
+        ]
+
+    def test_unchanged_fields_are_reused(self):
+        previous = FormBuilder(self.make_fields('Second')).get_page_form()
+        page_form = FormBuilder(self.make_fields('Changed')).get_page_form(previous)
+        form_cls, previous_cls = page_form.form_class, previous.form_class
+        self.assertIsNot(form_cls, previous_cls)
+        self.assertEqual(list(form_cls.base_fields), ['first', 'changed', 'third'])
+        self.assertIs(form_cls.base_fields['first'], previous_cls.base_fields['first'])
+        self.assertIsNot(form_cls.base_fields['third'], previous_cls.base_fields['third'])
+        self.assertEqual(set(page_form.field_sources), {('block-1', 'first'), ('block-2', 'changed')})
+
+    def make_duplicate_fields(self):
+        single = SingleLineFormFieldBlock()
+        multi = MultiLineFormFieldBlock()
+        return [
+            BlockField(single, single.to_python({'label': 'Name', 'required': True}), 'block-1'),
+            BlockField(multi, multi.to_python({'label': 'Name', 'required': False}), 'block-2'),
+        ]
+
+    def test_last_duplicate_field_wins(self):
+        expected = FormBuilder(self.make_duplicate_fields()).formfields['name']
+        self.assertIsInstance(expected.widget, forms.Textarea)
+        previous = FormBuilder(self.make_duplicate_fields()[:1]).get_page_form()
+        content_form_class_cache.clear()
+        for page_form in [
+                FormBuilder(self.make_duplicate_fields()).get_page_form(),
+                FormBuilder(self.make_duplicate_fields()).get_page_form(previous)]:
+            field = page_form.form_class.base_fields['name']
+            self.assertIsInstance(field.widget, forms.Textarea)
+            self.assertFalse(field.required)
+            self.assertEqual(set(page_form.field_sources), {('block-2', 'name')})
+            content_form_class_cache.clear()
+
+
+@override_settings(WAGTAILSTREAMFIELDFORMS_LAZY_FORM_FIELDS=True)
+class TestLazyFormFields(TestCase):
+
+    def setUp(self):
+        content_form_class_cache.clear()
+        self.form_cls = FormBuilder([
+            BlockField(TestFieldBlock(), {'label': 'First', 'help_text': '', 'required': True}),
+            BlockField(TestFieldBlock(), {'label': 'Second', 'help_text': '', 'required': False}),
+        ]).get_form_class()
+
+    def test_rendering_does_not_copy_fields(self):
+        form = self.form_cls()
+        self.assertIsInstance(form.fields, LazyFields)
+        html = form.as_p()
+        self.assertIn('name="first"', html)
+        self.assertIs(form['first'].field, self.form_cls.base_fields['first'])
+        self.assertFalse(form.is_multipart())
+        self.assertEqual(str(form.media), '')
+        self.assertEqual(self.form_cls({'first': 'a'}).changed_data, ['first'])
+        self.assertEqual(form.fields.copied, set())
+
+    def test_validation(self):
+        form = self.form_cls({'second': 'x'})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(list(form.errors), ['first'])
+        form = self.form_cls({'first': 'a', 'second': ''})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data, {'first': 'a', 'second': ''})
+        self.assertEqual(form.fields.copied, set())
+
+    def test_lookup_by_name_copies_field(self):
+        form = self.form_cls()
+        bound_field = form['first']
+        form.fields['first'].required = False
+        self.assertTrue(self.form_cls.base_fields['first'].required)
+        self.assertIsNot(form['first'], bound_field)
+        self.assertFalse(form['first'].field.required)
+        self.assertTrue(self.form_cls().fields['first'].required)
+
+    def test_changing_fields_does_not_change_other_forms(self):
+        form = self.form_cls()
+        for field in form.fields.values():
+            field.required = False
+        for name, field in form.fields.items():
+            field.label = 'Changed'
+        self.assertEqual(form.fields.copied, {'first', 'second'})
+        self.assertTrue(self.form_cls.base_fields['first'].required)
+        other = self.form_cls({'second': 'x'})
+        self.assertTrue(other['first'].field.required)
+        self.assertEqual(other['second'].field.label, 'Second')
+        self.assertFalse(other.is_valid())
+        self.assertEqual(other.fields.copied, set())
+
+    def test_field_order(self):
+        form = self.form_cls(field_order=['second', 'first'])
+        self.assertEqual(list(form.fields), ['second', 'first'])
+        self.assertIsNot(form.fields['first'], self.form_cls.base_fields['first'])
+
+    @override_settings(WAGTAILSTREAMFIELDFORMS_LAZY_FORM_FIELDS=False)
+    def test_disabled(self):
+        form = self.form_cls()
+        self.assertNotIsInstance(form.fields, LazyFields)
+        self.assertIsNot(form.fields['first'], self.form_cls.base_fields['first'])
+
+
+class TestIndexedChoiceFields(TestCase):
+
+    def setUp(self):
+        self.choices = [(str(i), 'Choice %d' % i) for i in range(20000)]
+
+    def test_valid_values(self):
+        field = IndexedMultipleChoiceField(choices=self.choices)
+        self.assertEqual(field.clean(['1', '19999']), ['1', '19999'])
+        with self.assertRaises(forms.ValidationError):
+            field.clean(['1', '20000'])
+        self.assertEqual(len(field.choice_index), 20000)
+
+    def test_optgroups(self):
+        field = IndexedChoiceField(choices=[('a', 'A'), ('Group', [('b', 'B')])])
+        self.assertEqual(field.clean('b'), 'b')
+        with self.assertRaises(forms.ValidationError):
+            field.clean('Group')
+
+    def test_same_output_as_choice_field(self):
+        for indexed, plain in ((IndexedChoiceField, forms.ChoiceField),
+                               (IndexedMultipleChoiceField, forms.MultipleChoiceField)):
+            self.assertHTMLEqual(
+                indexed(choices=self.choices[:5]).widget.render('name', '2'),
+                plain(choices=self.choices[:5]).widget.render('name', '2'),
+            )
+
+    def test_copies_share_index(self):
+        field = IndexedChoiceField(choices=self.choices)
+        self.assertIs(copy.deepcopy(field).choice_index, field.choice_index)
+
+    def test_setting_choices_rebuilds_index(self):
+        field = IndexedChoiceField(choices=self.choices)
+        field.choices = [('x', 'X')]
+        self.assertEqual(field.choice_index, frozenset(['x']))
+        self.assertEqual(field.widget.choices, [('x', 'X')])
+
+    def test_callable_choices(self):
+        field = IndexedChoiceField(choices=lambda: [('x', 'X')])
+        self.assertIsNone(field.choice_index)
+        self.assertEqual(field.clean('x'), 'x')
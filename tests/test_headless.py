@@ -0,0 +1,106 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from wagtailstreamfieldforms.cache import content_form_class_cache, form_class_cache
+from wagtailstreamfieldforms.models import Submission
+
+from .helpers import field_value, make_form_test_page
+
+
+class HeadlessTestCase(TestCase):
+
+    def setUp(self):
+        form_class_cache.clear()
+        content_form_class_cache.clear()
+        self.page = make_form_test_page(body=[
+            {'type': 'heading', 'value': 'Contact'},
+            {'type': 'singlelinefield', 'value': field_value('Name', required=True, default_value='Bob')},
+            {'type': 'emailfield', 'value': field_value('Email')},
+            {'type': 'checkboxfield', 'value': field_value('Agree', default_checked=True)},
+            {'type': 'dropdownfield', 'value': field_value(
+                'Colours',
+                choices=[{'key': 'r', 'description': 'Red'}, {'key': 'g', 'description': 'Green'}],
+                allow_multiple_selections=True,
+            )},
+        ])
+
+
+class TestFormSchemaView(HeadlessTestCase):
+
+    def get(self, page_id=None, **headers):
+        url = reverse('wagtailstreamfieldforms:form_schema', args=(page_id or self.page.pk,))
+        return self.client.get(url, **headers)
+
+    def test_schema(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        fields = response.json()['fields']
+        self.assertEqual([field['name'] for field in fields], ['name', 'email', 'agree', 'colours'])
+        self.assertEqual(fields[0], {
+            'name': 'name',
+            'type': 'singleline',
+            'label': 'Name',
+            'help_text': '',
+            'required': True,
+            'initial': 'Bob',
+            'max_length': 255,
+            'widget': 'TextInput',
+            'input_type': 'text',
+            'validation': {'required': True, 'max_length': 255},
+        })
+        self.assertEqual(fields[1]['input_type'], 'email')
+        self.assertEqual(fields[2]['initial'], True)
+        self.assertEqual(fields[3]['choices'], [['r', 'Red'], ['g', 'Green']])
+        self.assertTrue(fields[3]['multiple'])
+        self.assertEqual(fields[1]['validation'], {'required': False, 'format': 'email'})
+
+    def test_etag(self):
+        etag = self.get()['ETag']
+        self.assertEqual(etag, '"%s"' % self.page.get_form_class().content_hash)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_not_a_form_page(self):
+        self.assertEqual(self.get(page_id=1).status_code, 404)
+
+    def test_unpublished_page(self):
+        page = make_form_test_page(publish=False, slug='draft')
+        self.assertEqual(self.get(page_id=page.pk).status_code, 404)
+
+
+class TestFormSubmissionView(HeadlessTestCase):
+
+    def post(self, data):
+        url = reverse('wagtailstreamfieldforms:form_submission', args=(self.page.pk,))
+        return self.client.post(url, data, content_type='application/json')
+
+    def test_valid_submission(self):
+        response = self.post(json.dumps({'name': 'Alice', 'email': 'alice@example.com', 'agree': True, 'colours': ['g']}))
+        self.assertEqual(response.status_code, 201)
+        submission = Submission.objects.get()
+        self.assertEqual({key: json.loads(value) for key, value in submission.fields()}, {
+            'name': 'Alice',
+            'email': 'alice@example.com',
+            'agree': True,
+            'colours': ['g'],
+        })
+
+    def test_field_errors(self):
+        response = self.post(json.dumps({'email': 'nope', 'colours': ['x']}))
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual(errors['name'], [{'message': 'This field is required.', 'code': 'required'}])
+        self.assertEqual(errors['email'][0]['code'], 'invalid')
+        self.assertEqual(errors['colours'][0]['code'], 'invalid_choice')
+        self.assertFalse(Submission.objects.exists())
+
+    def test_invalid_json(self):
+        for body in ('{', '[]'):
+            response = self.post(body)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('__all__', response.json()['errors'])
+
+    def test_get_not_allowed(self):
+        url = reverse('wagtailstreamfieldforms:form_submission', args=(self.page.pk,))
+        self.assertEqual(self.client.get(url).status_code, 405)
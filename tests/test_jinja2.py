@@ -0,0 +1,76 @@
+from unittest import skipIf
+
+from django.test import RequestFactory, TestCase
+
+from wagtailstreamfieldforms.cache import fragment_cache
+from wagtailstreamfieldforms.forms import formfieldblocks
+
+from .helpers import field_value, make_form_test_page
+
+try:
+    import jinja2
+    from django.template.backends.jinja2 import Jinja2
+except ImportError:
+    jinja2 = None
+
+
+@skipIf(jinja2 is None, 'Jinja2 is not installed')
+class TestJinja2Extension(TestCase):
+
+    def setUp(self):
+        fragment_cache.clear()
+        self.engine = Jinja2({
+            'DIRS': [],
+            'APP_DIRS': True,
+            'NAME': 'jinja2',
+            'OPTIONS': {
+                'extensions': [
+                    'wagtail.core.jinja2tags.core',
+                    'wagtailstreamfieldforms.jinja2tags.forms',
+                ],
+            },
+        })
+        self.page = make_form_test_page(body=[
+            {'type': 'heading', 'value': 'Contact', 'id': 'heading'},
+            {'type': 'singlelinefield', 'value': field_value('Your Name', required=True), 'id': 'name-block'},
+            {'type': 'checkboxfield', 'value': field_value('Agree', default_checked=False), 'id': 'agree-block'},
+        ])
+        self.request = RequestFactory().get('/')
+
+    def render(self, source, **context):
+        return self.engine.from_string(source).render(context, self.request)
+
+    def test_include_block_matches_django_templates(self):
+        form = self.page.get_form()
+        html = self.render('{% for block in page.body %}{% include_block block %}{% endfor %}', page=self.page, form=form)
+        for block in self.page.body[1:]:
+            self.assertIn(block.render({'form': form}), html)
+        self.assertNotIn('&lt;', html)
+
+    def test_render_form_field_matches_render_basic(self):
+        form = self.page.get_form()
+        html = self.render(
+            '{% for block in page.body %}{{ render_form_field(block, form) }}{% endfor %}', page=self.page, form=form)
+        self.assertEqual(html, ''.join(block.render({'form': form}) for block in self.page.body[1:]))
+
+    def test_block_templates(self):
+        self.assertEqual(self.page.body[1].block.get_jinja2_template(), 'wagtailstreamfieldforms/blocks/singleline.html')
+        for name in formfieldblocks.names.values():
+            self.engine.get_template('wagtailstreamfieldforms/blocks/{0}.html'.format(name))
+
+    def test_get_form_field(self):
+        html = self.render(
+            '{% set field = get_form_field(page.body[1], form) %}{{ field.name }}|{{ field }}',
+            page=self.page,
+            form=self.page.get_form(),
+        )
+        name, widget = html.split('|')
+        self.assertEqual(name, 'your-name')
+        self.assertTrue(widget.startswith('<input type="text" name="your-name"'))
+
+    def test_unslugify(self):
+        self.assertEqual(self.render('{{ "your-name"|unslugify }}'), 'Your name')
+
+    def test_form_validation_rules(self):
+        html = self.render('{{ form_validation_rules(form, "rules") }}', form=self.page.get_form())
+        self.assertTrue(html.startswith('<script id="rules" type="application/json">'))
@@ -3,11 +3,23 @@
 
 import json
 
+from django.db import connection
 from django.test import TestCase
-from wagtail.core.blocks import CharBlock, ListBlock, RichTextBlock, StreamBlock, StructBlock
+from wagtail.core.blocks import Block, CharBlock, ListBlock, RichTextBlock, StreamBlock, StreamValue, StructBlock
 
 from wagtailstreamfieldforms.blocks import *
-from wagtailstreamfieldforms.models import FormFieldFinder
+from wagtailstreamfieldforms.models import (
+    FORM_FIELD_BLOCK,
+    BlockHandlerRegistry,
+    FormFieldFinder,
+    Submission,
+    SubmissionField,
+    blockhandlers,
+    list_block_children,
+    struct_block_children,
+)
+
+from .helpers import field_value, make_form_test_page
 
 
 class TestFormFieldFinder(TestCase):
@@ -260,3 +272,347 @@ class TestFormFieldFinder(TestCase):
         self.assertEqual(fields[4].value["label"], 'When is your birthday.')
         self.assertEqual(fields[5].value["label"], 'Can we share your answers?')
 
+
+    def test_block_ids(self):
+        class TestBlock(StreamBlock):
+            field = SingleLineFormFieldBlock()
+            stream = StreamBlock([('field', SingleLineFormFieldBlock())])
+
+        field = {"required": True, "default_value": "", "label": "Name", "help_text": ""}
+        value = TestBlock().to_python([
+            {'type': 'field', 'value': field, 'id': 'outer'},
+            {'type': 'stream', 'value': [{'type': 'field', 'value': field, 'id': 'inner'}], 'id': 'wrapper'},
+        ])
+
+        fields = FormFieldFinder().find_form_fields(TestBlock(), value)
+
+        self.assertEqual([f.block_id for f in fields], ['outer', 'inner'])
+
+
+class TestFormFieldFinderIterFormFields(TestCase):
+
+    def field(self, label):
+        return {"required": True, "default_value": "", "label": label, "help_text": ""}
+
+    def test_same_order_as_find_form_fields(self):
+        class TestStructBlock(StructBlock):
+            title = CharBlock()
+            field = SingleLineFormFieldBlock()
+
+        class TestBlock(StreamBlock):
+            field = SingleLineFormFieldBlock()
+            p = CharBlock()
+            special = TestStructBlock()
+            list = ListBlock(SingleLineFormFieldBlock())
+            stream = StreamBlock([('field', SingleLineFormFieldBlock()), ('p', CharBlock())])
+
+        value = TestBlock().to_python([
+            {'type': 'field', 'value': self.field('One'), 'id': 'a'},
+            {'type': 'p', 'value': 'A test'},
+            {'type': 'special', 'value': {'title': 'Title', 'field': self.field('Two')}, 'id': 'b'},
+            {'type': 'list', 'value': [self.field('Three'), self.field('Four')], 'id': 'c'},
+            {'type': 'stream', 'value': [{'type': 'field', 'value': self.field('Five'), 'id': 'd'}], 'id': 'e'},
+        ])
+
+        finder = FormFieldFinder()
+        found = finder.find_form_fields(TestBlock(), value)
+        iterated = list(finder.iter_form_fields(TestBlock(), value))
+
+        self.assertEqual([f.value['label'] for f in iterated], ['One', 'Two', 'Three', 'Four', 'Five'])
+        self.assertEqual([f.value['label'] for f in iterated], [f.value['label'] for f in found])
+        self.assertEqual([f.block_id for f in iterated], ['a', 'b', 'c', 'c', 'd'])
+        self.assertEqual([f.block_id for f in iterated], [f.block_id for f in found])
+
+    def test_deep_nesting(self):
+        depth = 5000
+        block = SingleLineFormFieldBlock()
+        value = self.field('Deep')
+        for i in range(depth):
+            block = ListBlock(block)
+            value = [value]
+
+        fields = list(FormFieldFinder().iter_form_fields(block, value))
+
+        self.assertEqual(len(fields), 1)
+        self.assertEqual(fields[0].value['label'], 'Deep')
+
+    def count_visited_blocks(self, depth):
+        class CountingBlockHandlerRegistry(BlockHandlerRegistry):
+            visited = 0
+
+            def lookup(self, block_class):
+                self.visited += 1
+                return super(CountingBlockHandlerRegistry, self).lookup(block_class)
+
+        registry = CountingBlockHandlerRegistry()
+        field_block = SingleLineFormFieldBlock()
+
+        @registry.register(WrapperBlock)
+        def wrapper_block_children(finder, block, value):
+            # every level holds a form field and the next level
+            yield field_block, value[0], None
+            yield block.child_block, value[1], None
+
+        class CountingFormFieldFinder(FormFieldFinder):
+            block_handlers = registry
+
+        block = SingleLineFormFieldBlock()
+        value = self.field('Level 0')
+        for i in range(1, depth):
+            block = WrapperBlock(block)
+            value = (self.field('Level {0}'.format(i)), value)
+
+        fields = list(CountingFormFieldFinder().iter_form_fields(block, value))
+
+        self.assertEqual(len(fields), depth)
+        self.assertEqual(fields[0].value['label'], 'Level {0}'.format(depth - 1))
+        return registry.visited
+
+    def test_linear_scaling(self):
+        # every wrapper is looked up when it is visited and when its definition
+        # is checked and every form field once, so doubling the depth doubles the work
+        for depth in (5000, 10000):
+            self.assertEqual(self.count_visited_blocks(depth), 3 * depth - 2)
+
+    def test_wide_stream(self):
+        class TestBlock(StreamBlock):
+            field = SingleLineFormFieldBlock()
+            p = CharBlock()
+
+        raw = []
+        for i in range(10000):
+            raw.append({'type': 'p', 'value': 'Text'})
+            raw.append({'type': 'field', 'value': self.field('Field {0}'.format(i))})
+        value = TestBlock().to_python(raw)
+
+        fields = FormFieldFinder().iter_form_fields(TestBlock(), value)
+
+        self.assertEqual(next(fields).value['label'], 'Field 0')
+        self.assertEqual(len(list(fields)), 9999)
+
+    def test_overridden_find_form_fields(self):
+        class SpecialFormFieldFinder(FormFieldFinder):
+            def find_form_fields(self, block, value):
+                return ['special']
+
+        fields = list(SpecialFormFieldFinder().iter_form_fields(SingleLineFormFieldBlock(), self.field('One')))
+
+        self.assertEqual(fields, ['special'])
+
+    def test_overridden_handle_method(self):
+        class TestStructBlock(StructBlock):
+            field = SingleLineFormFieldBlock()
+
+        class TestBlock(StreamBlock):
+            field = SingleLineFormFieldBlock()
+            struct = TestStructBlock()
+
+        class SkipStructsFormFieldFinder(FormFieldFinder):
+            def handle_struct_block(self, block, value):
+                return []
+
+        value = TestBlock().to_python([
+            {'type': 'field', 'value': self.field('One'), 'id': 'a'},
+            {'type': 'struct', 'value': {'field': self.field('Two')}, 'id': 'b'},
+        ])
+        finder = SkipStructsFormFieldFinder()
+
+        self.assertTrue(finder.is_recursive())
+        self.assertFalse(FormFieldFinder().is_recursive())
+        self.assertEqual([f.value['label'] for f in finder.iter_form_fields(TestBlock(), value)], ['One'])
+        self.assertEqual([f.value['label'] for f in finder.find_form_fields(TestBlock(), value)], ['One'])
+
+
+class WrapperBlock(Block):
+    '''A container block that does not inherit from any of the Wagtail container blocks.'''
+    def __init__(self, child_block, **kwargs):
+        super(WrapperBlock, self).__init__(**kwargs)
+        self.child_block = child_block
+
+
+class TestBlockHandlerRegistry(TestCase):
+
+    def test_lookup_walks_mro(self):
+        class TestStructBlock(StructBlock):
+            title = CharBlock()
+
+        self.assertIs(blockhandlers.lookup(TestStructBlock), struct_block_children)
+        self.assertIs(blockhandlers.lookup(ListBlock), list_block_children)
+        self.assertIsNone(blockhandlers.lookup(CharBlock))
+
+    def test_form_fields_take_precedence(self):
+        class TestFieldBlock(StructBlock, FormFieldBlockMixin):
+            pass
+
+        self.assertEqual(blockhandlers.lookup(TestFieldBlock), FORM_FIELD_BLOCK)
+        self.assertEqual(blockhandlers.lookup(SingleLineFormFieldBlock), FORM_FIELD_BLOCK)
+
+    def test_lookup_is_memoized(self):
+        registry = BlockHandlerRegistry()
+        registry.register(StructBlock, struct_block_children)
+        registry.lookup(StructBlock)
+        self.assertIs(registry.resolved[StructBlock], struct_block_children)
+
+        def handler(finder, block, value):
+            return []
+        registry.register(StructBlock, handler)
+        self.assertIs(registry.lookup(StructBlock), handler)
+
+    def test_custom_container_handler(self):
+        registry = BlockHandlerRegistry()
+
+        @registry.register(WrapperBlock)
+        def wrapper_block_children(finder, block, value):
+            return ((block.child_block, val, None) for val in value)
+
+        class WrapperFormFieldFinder(FormFieldFinder):
+            block_handlers = registry
+
+        block = WrapperBlock(SingleLineFormFieldBlock())
+        value = [{"required": True, "default_value": "", "label": label, "help_text": ""} for label in ('A', 'B')]
+
+        fields = list(WrapperFormFieldFinder().iter_form_fields(block, value))
+
+        self.assertEqual([f.value['label'] for f in fields], ['A', 'B'])
+        self.assertEqual(list(FormFieldFinder().iter_form_fields(block, value)), [])
+
+
+class TestContainsFormFields(TestCase):
+
+    def test_contains_form_fields(self):
+        class QuoteBlock(StructBlock):
+            text = CharBlock()
+
+        class SectionBlock(StructBlock):
+            title = CharBlock()
+            fields = ListBlock(SingleLineFormFieldBlock())
+
+        self.assertTrue(blockhandlers.contains_form_fields(SingleLineFormFieldBlock()))
+        self.assertFalse(blockhandlers.contains_form_fields(CharBlock()))
+        self.assertFalse(blockhandlers.contains_form_fields(QuoteBlock()))
+        self.assertFalse(blockhandlers.contains_form_fields(ListBlock(QuoteBlock())))
+        self.assertTrue(blockhandlers.contains_form_fields(SectionBlock()))
+        self.assertTrue(blockhandlers.contains_form_fields(StreamBlock([('quote', QuoteBlock()), ('section', SectionBlock())])))
+
+    def test_unknown_container_is_assumed_to_contain_form_fields(self):
+        registry = BlockHandlerRegistry()
+        registry.register(WrapperBlock, lambda finder, block, value: [])
+        self.assertTrue(registry.contains_form_fields(WrapperBlock(CharBlock())))
+        self.assertFalse(blockhandlers.contains_form_fields(WrapperBlock(CharBlock())))
+
+    def test_deep_definition(self):
+        block = SingleLineFormFieldBlock()
+        for i in range(5000):
+            block = ListBlock(block)
+        self.assertTrue(blockhandlers.contains_form_fields(block))
+
+    def test_skips_subtrees_without_form_fields(self):
+        class QuoteBlock(StructBlock):
+            text = CharBlock()
+
+        class TestBlock(StreamBlock):
+            quote = QuoteBlock()
+            field = SingleLineFormFieldBlock()
+
+        visited = []
+
+        class RecordingFormFieldFinder(FormFieldFinder):
+            def iter_struct_block(self, block, value):
+                visited.append(block)
+                return super(RecordingFormFieldFinder, self).iter_struct_block(block, value)
+
+        value = TestBlock().to_python([
+            {'type': 'quote', 'value': {'text': 'A quote'}},
+            {'type': 'field', 'value': {"required": True, "default_value": "", "label": "Name", "help_text": ""}},
+        ])
+
+        fields = list(RecordingFormFieldFinder().iter_form_fields(TestBlock(), value))
+
+        self.assertEqual(len(fields), 1)
+        self.assertEqual(visited, [])
+
+
+class TestFormStreamFields(TestCase):
+
+    def test_only_stream_fields_with_form_fields(self):
+        page = make_form_test_page()
+        fields = page.get_form_stream_fields(page.get_form_field_finder())
+        self.assertEqual([field.name for field in fields], ['body'])
+
+
+class CountingCharBlock(CharBlock):
+    '''CharBlock recording every value converted to Python.'''
+    converted = []
+
+    def to_python(self, value):
+        self.converted.append(value)
+        return super(CountingCharBlock, self).to_python(value)
+
+
+class TestRawStreamData(TestCase):
+
+    def test_only_form_field_children_are_converted(self):
+        class TestBlock(StreamBlock):
+            p = CountingCharBlock()
+            field = SingleLineFormFieldBlock()
+            section = StructBlock([('title', CountingCharBlock()), ('field', SingleLineFormFieldBlock())])
+
+        field = {"required": True, "default_value": "", "label": "Name", "help_text": ""}
+        value = TestBlock().to_python([
+            {'type': 'p', 'value': 'Skipped', 'id': 'a'},
+            {'type': 'field', 'value': field, 'id': 'b'},
+            {'type': 'section', 'value': {'title': 'Converted', 'field': field}, 'id': 'c'},
+        ])
+        CountingCharBlock.converted = []
+
+        fields = list(FormFieldFinder().iter_form_fields(TestBlock(), value))
+
+        self.assertEqual([f.block_id for f in fields], ['b', 'c'])
+        self.assertEqual(CountingCharBlock.converted, ['Converted'])
+
+    def test_non_lazy_stream_value(self):
+        class TestBlock(StreamBlock):
+            p = CharBlock()
+            field = SingleLineFormFieldBlock()
+
+        field = {"required": True, "default_value": "", "label": "Name", "help_text": ""}
+        value = StreamValue(TestBlock(), [('p', 'Text'), ('field', SingleLineFormFieldBlock().to_python(field), 'b')])
+
+        fields = list(FormFieldFinder().iter_form_fields(TestBlock(), value))
+
+        self.assertEqual([f.block_id for f in fields], ['b'])
+
+
+class TestProcessFormSubmission(TestCase):
+    def get_batch_size(self):
+        '''Returns the number of fields bulk_create inserts per query on the test database.'''
+        fields = [field for field in SubmissionField._meta.concrete_fields if not field.primary_key]
+        return connection.ops.bulk_batch_size(fields, [None]) or 1
+
+    def submit(self, count):
+        body = [
+            {'type': 'singlelinefield', 'value': field_value('Field {0}'.format(i))}
+            for i in range(count)
+        ]
+        page = make_form_test_page(body=body, slug='form-{0}'.format(count))
+        form = page.get_form({'field-{0}'.format(i): str(i) for i in range(count)})
+        self.assertTrue(form.is_valid())
+        batches = -(-count // self.get_batch_size())
+        with self.assertNumQueries(1 + batches):
+            return page.process_form_submission(form)
+
+    def test_one_query_per_batch_of_fields(self):
+        self.submit(1)
+        submission = self.submit(60)
+        self.assertEqual(Submission.objects.count(), 2)
+        fields = dict(submission.fields())
+        self.assertEqual(len(fields), 60)
+        self.assertEqual(json.loads(fields['field-59']), '59')
+
+    def test_more_fields_than_a_batch(self):
+        if connection.vendor == 'sqlite':
+            self.assertEqual(self.get_batch_size(), 333)
+        submission = self.submit(400)
+        fields = dict(submission.fields())
+        self.assertEqual(len(fields), 400)
+        self.assertEqual(json.loads(fields['field-399']), '399')
@@ -0,0 +1,86 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from wagtailstreamfieldforms.page_cache import CSRF_TOKEN_PLACEHOLDER
+
+from .helpers import make_form_test_page
+
+
+class TestPageCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.page = make_form_test_page()
+        self.page.cache_form_page = True
+
+    def get(self, path='/', user=None, **kwargs):
+        request = self.factory.get(path, **kwargs)
+        request.user = user or AnonymousUser()
+        return request
+
+    def serve(self, request):
+        return self.page.serve(request)
+
+    def test_disabled_by_default(self):
+        self.page.cache_form_page = False
+        self.assertIsNone(self.page.get_page_cache_key(self.get()))
+
+    def test_anonymous_get_is_cached(self):
+        key = self.page.get_page_cache_key(self.get())
+        self.assertIsNotNone(key)
+        response = self.serve(self.get())
+        content = response.content.decode()
+        self.assertIn('name="csrfmiddlewaretoken"', content)
+        self.assertNotIn(CSRF_TOKEN_PLACEHOLDER, content)
+        self.assertIn(CSRF_TOKEN_PLACEHOLDER.encode(), cache.get(key)[0])
+
+        with self.assertNumQueries(0):
+            response = self.serve(self.get())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('name="name"', response.content.decode())
+        self.assertNotIn(CSRF_TOKEN_PLACEHOLDER, response.content.decode())
+
+    def test_tokens_differ_per_request(self):
+        self.serve(self.get())
+        first = self.get()
+        second = self.get()
+        self.assertNotEqual(self.serve(first).content, self.serve(second).content)
+        self.assertTrue(first.META.get('CSRF_COOKIE_USED'))
+
+    def test_authenticated_and_query_string_requests_are_not_cached(self):
+        user = User.objects.create_user('bob', 'bob@example.com', 'password')
+        self.assertIsNone(self.page.get_page_cache_key(self.get(user=user)))
+        self.assertIsNone(self.page.get_page_cache_key(self.get('/?page=2')))
+        request = self.factory.post('/', {})
+        request.user = AnonymousUser()
+        self.assertIsNone(self.page.get_page_cache_key(request))
+
+    def test_preview_is_not_cached(self):
+        self.page.is_form_preview = True
+        self.assertIsNone(self.page.get_page_cache_key(self.get()))
+
+    def test_new_revision_uses_new_key(self):
+        key = self.page.get_page_cache_key(self.get())
+        self.page.body = '[{"type": "singlelinefield", "value": {"label": "Phone", "help_text": "", "required": false, "default_value": ""}}]'
+        self.page.save_revision().publish()
+        self.page.refresh_from_db()
+        self.page.cache_form_page = True
+        self.assertNotEqual(self.page.get_page_cache_key(self.get()), key)
+
+    @override_settings(WAGTAILSTREAMFIELDFORMS_PAGE_CACHE_SUBSTITUTE_TOKEN=False)
+    def test_placeholder_left_for_reverse_proxies(self):
+        self.serve(self.get())
+        self.assertIn(CSRF_TOKEN_PLACEHOLDER, self.serve(self.get()).content.decode())
+
+
+class TestCsrfTokenView(TestCase):
+
+    def test_returns_token(self):
+        response = self.client.get(reverse('wagtailstreamfieldforms:csrf_token'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['csrfToken'])
+        self.assertIn('csrftoken', response.cookies)
+        self.assertIn('no-cache', response['Cache-Control'])
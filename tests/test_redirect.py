@@ -0,0 +1,74 @@
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase, override_settings
+from wagtail.core.models import PageViewRestriction, Site
+
+from wagtailstreamfieldforms.models import Submission
+
+from .helpers import make_form_test_page
+from .models import FormTestPage
+
+
+class TestRedirectAfterSubmission(TestCase):
+
+    def setUp(self):
+        FormTestPage.redirect_after_submission = True
+        self.addCleanup(delattr, FormTestPage, 'redirect_after_submission')
+        self.factory = RequestFactory()
+        root = Site.objects.get(is_default_site=True).root_page
+        self.page = make_form_test_page(parent=root)
+
+    def post(self, data):
+        request = self.factory.post(self.page.url, data)
+        request.user = AnonymousUser()
+        return self.page.serve(request)
+
+    def test_valid_submission_redirects(self):
+        response = self.post({'name': 'Bob', 'email': 'bob@example.com'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], '{0}submitted/{1}/'.format(self.page.url, self.page.live_revision_id))
+        submission = Submission.objects.get(page=self.page)
+        self.assertEqual(dict(submission.fields())['name'], json.dumps('Bob'))
+
+    def test_invalid_submission_renders_form(self):
+        response = self.post({'email': 'bob@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('name="name"', response.content.decode())
+        self.assertFalse(Submission.objects.exists())
+
+    def test_disabled_renders_submitted_template(self):
+        FormTestPage.redirect_after_submission = False
+        response = self.post({'name': 'Bob', 'email': 'bob@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Thank you.', response.content.decode())
+
+    @override_settings(WAGTAILSTREAMFIELDFORMS_SUBMITTED_MAX_AGE=60)
+    def test_submitted_page_is_cacheable(self):
+        response = self.client.get('{0}submitted/{1}/'.format(self.page.url, self.page.live_revision_id))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Thank you.', response.content.decode())
+        self.assertNotIn('name="name"', response.content.decode())
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+    def test_restricted_submitted_page_is_not_public(self):
+        restriction = PageViewRestriction.objects.create(
+            page=self.page, restriction_type=PageViewRestriction.PASSWORD, password='secret')
+        session = self.client.session
+        session[restriction.passed_view_restrictions_session_key] = [restriction.pk]
+        session.save()
+        response = self.client.get('{0}submitted/{1}/'.format(self.page.url, self.page.live_revision_id))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Thank you.', response.content.decode())
+        self.assertNotIn('public', response.get('Cache-Control', ''))
+
+    def test_stale_revision_redirects_to_current(self):
+        response = self.client.get('{0}submitted/0/'.format(self.page.url))
+        self.assertRedirects(
+            response, '{0}submitted/{1}/'.format(self.page.url, self.page.live_revision_id), fetch_redirect_response=False)
+
+    def test_submitted_path_is_not_routed_when_disabled(self):
+        FormTestPage.redirect_after_submission = False
+        response = self.client.get('{0}submitted/{1}/'.format(self.page.url, self.page.live_revision_id))
+        self.assertEqual(response.status_code, 404)
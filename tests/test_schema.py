@@ -0,0 +1,192 @@
+import shutil
+import tempfile
+import threading
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from wagtail.core.blocks import StructBlock
+
+from wagtailstreamfieldforms.blocks import DropdownFormFieldBlock, FormFieldBlockMixin, SingleLineFormFieldBlock
+from wagtailstreamfieldforms.cache import form_class_cache
+from wagtailstreamfieldforms.forms import BlockField, formfieldblocks
+from wagtailstreamfieldforms.models import FormSchema
+from wagtailstreamfieldforms.schema import (
+    compile_form_fields,
+    dumps,
+    get_or_compile_schema,
+    get_schema_cache_key,
+    load_form_fields,
+    loads,
+)
+
+from .helpers import field_value, make_form_test_page
+
+
+class UnregisteredFieldBlock(FormFieldBlockMixin, StructBlock):
+    pass
+
+
+class TestCompileFormFields(TestCase):
+
+    def test_round_trip(self):
+        fields = [
+            BlockField(SingleLineFormFieldBlock(), field_value('First Name', required=True)),
+            BlockField(DropdownFormFieldBlock(), {
+                'label': 'Colour',
+                'help_text': '',
+                'required': False,
+                'choices': [{'key': 'red', 'description': 'Red'}],
+                'allow_multiple_selections': True,
+            }),
+        ]
+        specs = loads(dumps(compile_form_fields(fields)))
+        self.assertEqual([spec['id'] for spec in specs], ['first-name', 'colour'])
+        self.assertEqual([spec['type'] for spec in specs], ['singleline', 'dropdown'])
+
+        loaded = load_form_fields(specs)
+        self.assertIs(loaded[0].block, formfieldblocks.get_block('singleline'))
+        self.assertEqual(loaded[0].get_field_id(), 'first-name')
+        self.assertTrue(loaded[0].get_form_field().required)
+        self.assertEqual(loaded[1].get_form_field().choices, [('red', 'Red')])
+        self.assertTrue(loaded[1].value['allow_multiple_selections'])
+
+    def test_unregistered_block(self):
+        fields = [BlockField(UnregisteredFieldBlock(), {'label': 'Test', 'help_text': '', 'required': False})]
+        self.assertIsNone(compile_form_fields(fields))
+
+
+class TestFormSchema(TestCase):
+
+    def setUp(self):
+        form_class_cache.clear()
+
+    def test_schema_created_on_publish(self):
+        page = make_form_test_page()
+        form_schema = FormSchema.objects.get(page=page)
+        self.assertEqual(form_schema.revision_id, page.live_revision_id)
+        self.assertEqual([field.get_field_id() for field in form_schema.get_form_fields()], ['name', 'email'])
+
+    def test_schema_deleted_on_unpublish(self):
+        page = make_form_test_page()
+        page.unpublish()
+        self.assertFalse(FormSchema.objects.filter(page=page).exists())
+
+    def test_form_class_built_from_schema(self):
+        page = make_form_test_page()
+        form_class_cache.clear()
+        FormSchema.objects.filter(page=page).update(fields=dumps([
+            {'id': 'from-schema', 'type': 'singleline', 'value': field_value('From Schema')},
+        ]))
+        self.assertEqual(list(page.get_form_class().base_fields), ['from-schema'])
+
+    def test_stale_schema_is_ignored(self):
+        page = make_form_test_page()
+        form_class_cache.clear()
+        FormSchema.objects.filter(page=page).update(revision=None, fields='[]')
+        self.assertEqual(list(page.get_form_class().base_fields), ['name', 'email'])
+
+    def test_preview_ignores_schema(self):
+        page = make_form_test_page()
+        page.is_form_preview = True
+        self.assertIsNone(page.get_compiled_form_fields())
+
+
+class SharedSchemaCacheTests(object):
+    '''Tests for the shared schema cache that are run against several cache backends.'''
+
+    def setUp(self):
+        form_class_cache.clear()
+        caches['schema'].clear()
+
+    def test_disabled_without_setting(self):
+        with override_settings(WAGTAILSTREAMFIELDFORMS_SCHEMA_CACHE=None):
+            self.assertEqual(get_or_compile_schema(1, 1, lambda: 'compiled'), 'compiled')
+        self.assertIsNone(caches['schema'].get(get_schema_cache_key(1, 1)))
+
+    def test_compiled_once(self):
+        calls = []
+
+        def compile_schema():
+            calls.append(1)
+            return '[]'
+
+        self.assertEqual(get_or_compile_schema(1, 1, compile_schema), '[]')
+        self.assertEqual(get_or_compile_schema(1, 1, compile_schema), '[]')
+        self.assertEqual(len(calls), 1)
+        self.assertIsNone(caches['schema'].get(get_schema_cache_key(1, 1) + ':lock'))
+
+    def test_keys_versioned_by_revision(self):
+        get_or_compile_schema(1, 1, lambda: '"first"')
+        self.assertEqual(get_or_compile_schema(1, 2, lambda: '"second"'), '"second"')
+        self.assertEqual(get_or_compile_schema(1, 1, lambda: '"third"'), '"first"')
+
+    def test_waits_for_lock_holder(self):
+        key = get_schema_cache_key(1, 1)
+        caches['schema'].add(key + ':lock', 1)
+        timer = threading.Timer(0.1, lambda: caches['schema'].set(key, '"from other worker"'))
+        timer.start()
+        try:
+            data = get_or_compile_schema(1, 1, lambda: self.fail('Schema compiled while locked.'))
+        finally:
+            timer.join()
+        self.assertEqual(data, '"from other worker"')
+
+    @override_settings(WAGTAILSTREAMFIELDFORMS_SCHEMA_CACHE_WAIT=0.1)
+    def test_compiles_when_lock_holder_does_not_finish(self):
+        caches['schema'].add(get_schema_cache_key(1, 1) + ':lock', 1)
+        self.assertEqual(get_or_compile_schema(1, 1, lambda: '"compiled"'), '"compiled"')
+
+    def test_publish_fills_cache(self):
+        page = make_form_test_page()
+        data = caches['schema'].get(get_schema_cache_key(page.pk, page.live_revision_id))
+        self.assertEqual([spec['id'] for spec in loads(data)], ['name', 'email'])
+
+    def test_form_class_built_from_cache(self):
+        page = make_form_test_page()
+        form_class_cache.clear()
+        FormSchema.objects.all().delete()
+        caches['schema'].set(get_schema_cache_key(page.pk, page.live_revision_id), dumps([
+            {'id': 'from-cache', 'type': 'singleline', 'value': field_value('From Cache')},
+        ]))
+        self.assertEqual(list(page.get_form_class().base_fields), ['from-cache'])
+
+    def test_form_class_compiled_into_cache(self):
+        page = make_form_test_page()
+        form_class_cache.clear()
+        FormSchema.objects.all().delete()
+        caches['schema'].clear()
+        self.assertEqual(list(page.get_form_class().base_fields), ['name', 'email'])
+        self.assertIsNotNone(caches['schema'].get(get_schema_cache_key(page.pk, page.live_revision_id)))
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'schema': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'schema'},
+    },
+    WAGTAILSTREAMFIELDFORMS_SCHEMA_CACHE='schema',
+)
+class TestLocMemSharedSchemaCache(SharedSchemaCacheTests, TestCase):
+    pass
+
+
+class TestFileBasedSharedSchemaCache(SharedSchemaCacheTests, TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'schema': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cls.cache_dir},
+            },
+            WAGTAILSTREAMFIELDFORMS_SCHEMA_CACHE='schema',
+        )
+        cls.settings_override.enable()
+        super(TestFileBasedSharedSchemaCache, cls).setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super(TestFileBasedSharedSchemaCache, cls).tearDownClass()
+        cls.settings_override.disable()
+        shutil.rmtree(cls.cache_dir)
@@ -0,0 +1,185 @@
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import RequestFactory, TestCase, override_settings
+
+from wagtailstreamfieldforms.drafts import DraftStore
+from wagtailstreamfieldforms.models import Submission
+
+from .helpers import field_value, make_form_test_page
+
+
+class MultiStepTestCase(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.session = SessionStore()
+        self.page = make_form_test_page(body=[
+            {'type': 'heading', 'value': 'About you'},
+            {'type': 'singlelinefield', 'value': field_value('Name', required=True)},
+            {'type': 'step', 'value': {'title': 'Contact'}},
+            {'type': 'emailfield', 'value': field_value('Email', required=True)},
+            {'type': 'checkboxfield', 'value': field_value('Subscribe', default_checked=False)},
+            {'type': 'step', 'value': {'title': 'Empty'}},
+            {'type': 'step', 'value': {'title': 'Extra'}},
+            {'type': 'singlelinefield', 'value': field_value('Comment')},
+        ])
+
+    def request(self, data=None):
+        if data is None:
+            request = self.factory.get('/')
+        else:
+            request = self.factory.post('/', data)
+        request.user = AnonymousUser()
+        request.session = self.session
+        return self.page.serve(request)
+
+
+class TestFormSteps(MultiStepTestCase):
+
+    def test_steps(self):
+        self.assertTrue(self.page.has_form_steps())
+        steps = self.page.get_form_steps()
+        self.assertEqual([(step.index, step.title, step.field_ids) for step in steps], [
+            (0, None, ['name']),
+            (1, 'Contact', ['email', 'subscribe']),
+            (2, 'Extra', ['comment']),
+        ])
+
+    def test_single_step(self):
+        page = make_form_test_page(slug='single')
+        self.assertFalse(page.has_form_steps())
+        self.assertEqual(len(page.get_form_steps()), 1)
+
+    def test_only_current_step_is_rendered(self):
+        response = self.request()
+        html = response.content.decode()
+        self.assertIn('name="name"', html)
+        self.assertNotIn('name="email"', html)
+        self.assertIn('name="form_step" value="0"', html)
+
+    def test_walk_through_steps(self):
+        response = self.request({'form_step': '0', 'name': 'Alice'})
+        html = response.content.decode()
+        self.assertIn('name="email"', html)
+        self.assertNotIn('name="name"', html)
+
+        response = self.request({'form_step': '1', 'email': 'nope'})
+        self.assertIn('name="form_step" value="1"', response.content.decode())
+        self.assertEqual(DraftStore(self.session).get(self.page), (1, {'name': ['Alice'], 'email': ['nope']}))
+
+        self.request({'form_step': '1', 'email': 'alice@example.com', 'subscribe': 'on'})
+        self.assertEqual(Submission.objects.count(), 0)
+        self.request({'form_step': '2', 'comment': 'Hi'})
+
+        submission = Submission.objects.get()
+        self.assertEqual({key: json.loads(value) for key, value in submission.fields()}, {
+            'name': 'Alice',
+            'email': 'alice@example.com',
+            'subscribe': True,
+            'comment': 'Hi',
+        })
+        self.assertEqual(DraftStore(self.session).get(self.page), (0, {}))
+
+    def test_invalid_step_is_not_advanced(self):
+        self.request({'form_step': '0', 'name': ''})
+        self.assertEqual(DraftStore(self.session).get(self.page)[0], 0)
+
+    def test_steps_cannot_be_skipped(self):
+        self.request({'form_step': '2', 'comment': 'Hi'})
+        self.assertEqual(DraftStore(self.session).get(self.page), (0, {}))
+        self.assertFalse(Submission.objects.exists())
+
+    def test_previous_step(self):
+        self.request({'form_step': '0', 'name': 'Alice'})
+        response = self.request({'form_step': '1', 'email': 'a@example.com', 'form_previous': '1'})
+        html = response.content.decode()
+        self.assertIn('value="Alice"', html)
+        self.assertEqual(DraftStore(self.session).get(self.page)[0], 0)
+
+    def test_draft_of_old_revision_is_discarded(self):
+        self.request({'form_step': '0', 'name': 'Alice'})
+        self.page.save_revision().publish()
+        self.page.refresh_from_db()
+        self.assertEqual(DraftStore(self.session).get(self.page), (0, {}))
+
+    @override_settings(WAGTAILSTREAMFIELDFORMS_DRAFT_MAX_SIZE=40)
+    def test_draft_size_limit(self):
+        response = self.request({'form_step': '0', 'name': 'A' * 100})
+        self.assertIn('too much data', response.content.decode())
+        self.assertEqual(DraftStore(self.session).get(self.page), (0, {}))
+
+    def test_pages_with_steps_are_not_cached(self):
+        self.page.cache_form_page = True
+        self.page.conditional_form_page = True
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        self.assertIsNone(self.page.get_page_cache_key(request))
+        self.assertIsNone(self.page.get_form_page_etag(request))
+
+    def test_complete_form_is_validated_after_last_step(self):
+        page = make_form_test_page(slug='conditional', body=[
+            {'type': 'singlelinefield', 'value': field_value('Kind')},
+            {'type': 'step', 'value': {'title': 'Details'}},
+            {'type': 'singlelinefield', 'value': field_value(
+                'Details', required=True, condition_field='Kind', condition_value='other')},
+        ])
+        self.page = page
+        self.request({'form_step': '0', 'kind': 'other'})
+        response = self.request({'form_step': '1', 'details': ''})
+        self.assertIn('name="form_step" value="1"', response.content.decode())
+        self.assertFalse(Submission.objects.exists())
+        self.request({'form_step': '1', 'details': 'More'})
+        self.assertEqual(Submission.objects.count(), 1)
+
+    def make_conditional_page(self):
+        self.page = make_form_test_page(slug='conditional', body=[
+            {'type': 'checkboxfield', 'value': field_value('Subscribe', default_checked=False)},
+            {'type': 'step', 'value': {'title': 'Preferences'}},
+            {'type': 'singlelinefield', 'value': field_value('Frequency', required=True, condition_field='Subscribe')},
+            {'type': 'step', 'value': {'title': 'Extra'}},
+            {'type': 'singlelinefield', 'value': field_value('Comment')},
+        ])
+
+    def test_condition_on_earlier_step(self):
+        self.make_conditional_page()
+        self.request({'form_step': '0', 'subscribe': 'on'})
+        response = self.request({'form_step': '1', 'frequency': ''})
+        self.assertIn('name="form_step" value="1"', response.content.decode())
+        self.assertEqual(DraftStore(self.session).get(self.page)[0], 1)
+        self.request({'form_step': '1', 'frequency': 'Weekly'})
+        self.assertEqual(DraftStore(self.session).get(self.page)[0], 2)
+
+    def test_condition_on_earlier_step_not_met(self):
+        self.make_conditional_page()
+        self.request({'form_step': '0'})
+        self.request({'form_step': '1', 'frequency': ''})
+        self.assertEqual(DraftStore(self.session).get(self.page)[0], 2)
+
+    def test_step_validation_rules(self):
+        self.make_conditional_page()
+        steps = self.page.get_form_steps()
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        for data, met in [({'subscribe': ['on']}, True), ({}, False)]:
+            values = self.page.get_step_condition_values(request, steps, steps[1], data)
+            form = self.page.get_step_form(request, steps[1], condition_values=values)
+            self.assertEqual(list(form.validation_rules), ['frequency'])
+            self.assertEqual(form.validation_rules['frequency']['condition'], {'field': 'subscribe', 'value': '', 'met': met})
+            self.assertNotIn('met', self.page.get_form_class().validation_rules['frequency']['condition'])
+
+
+class TestDraftStore(TestCase):
+
+    @override_settings(WAGTAILSTREAMFIELDFORMS_DRAFT_LIMIT=2)
+    def test_limit(self):
+        session = SessionStore()
+        store = DraftStore(session)
+        pages = [make_form_test_page(slug='page-%d' % i) for i in range(3)]
+        for page in pages:
+            self.assertTrue(store.save(page, 1, {'name': ['x']}))
+        self.assertEqual(store.get(pages[0]), (0, {}))
+        self.assertEqual(store.get(pages[2]), (1, {'name': ['x']}))
+        store.clear(pages[2])
+        self.assertEqual(store.get(pages[2]), (0, {}))
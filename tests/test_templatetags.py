@@ -0,0 +1,56 @@
+from django.template import Context, Template
+from django.test import TestCase
+
+from wagtailstreamfieldforms.templatetags.wagtailstreamfieldforms import get_form_field, unslugify
+
+from .helpers import field_value, make_form_test_page
+
+
+class TestUnslugify(TestCase):
+
+    def test_unslugify(self):
+        self.assertEqual(unslugify('your-name'), 'Your name')
+
+
+class TestGetFormField(TestCase):
+
+    def setUp(self):
+        self.page = make_form_test_page(body=[
+            {'type': 'heading', 'value': 'Contact', 'id': 'heading'},
+            {'type': 'singlelinefield', 'value': field_value('Name'), 'id': 'name-block'},
+            {'type': 'section', 'value': {'title': 'Section', 'field': field_value('Nested')}, 'id': 'section'},
+        ])
+        self.form = self.page.get_form()
+
+    def test_lookup_by_block_id(self):
+        block = self.page.body[1]
+        self.assertEqual(self.form.get_block_index(), {
+            'name-block': self.form['name'],
+            'section': self.form['nested'],
+        })
+        self.assertIs(get_form_field(block, self.form), self.form['name'])
+
+    def test_lookup_by_label(self):
+        self.assertIs(get_form_field(self.page.body[2].value['field'], self.form), self.form['nested'])
+        self.assertIsNone(get_form_field(self.page.body[0], self.form))
+
+    def test_template_tag(self):
+        template = Template(
+            '{% load wagtailstreamfieldforms %}'
+            '{% for block in page.body %}{% get_form_field block form as field %}'
+            '{% if field %}[{{ field.name }}]{% endif %}{% endfor %}'
+        )
+        output = template.render(Context({'page': self.page, 'form': self.form}))
+        self.assertEqual(output, '[name][nested]')
+
+    def test_pages_sharing_a_form_class(self):
+        other = make_form_test_page(slug='other', body=[
+            {'type': 'heading', 'value': 'Contact', 'id': 'other-heading'},
+            {'type': 'singlelinefield', 'value': field_value('Name'), 'id': 'other-name-block'},
+            {'type': 'section', 'value': {'title': 'Section', 'field': field_value('Nested')}, 'id': 'other-section'},
+        ])
+        self.assertIs(other.get_form_class(), self.page.get_form_class())
+        form = other.get_form()
+        self.assertIs(get_form_field(other.body[2], form), form['nested'])
+        self.assertIs(get_form_field(self.page.body[2], self.form), self.form['nested'])
+        self.assertIsNone(get_form_field(self.page.body[2], form))
@@ -0,0 +1,17 @@
+from django.test import TestCase
+
+from wagtailstreamfieldforms.utils import _slugify_label, create_field_id
+
+
+class TestCreateFieldId(TestCase):
+
+    def test_create_field_id(self):
+        self.assertEqual(create_field_id('What is your name?'), 'what-is-your-name')
+
+    def test_memoized(self):
+        _slugify_label.cache_clear()
+        create_field_id('Memoized Label')
+        create_field_id('Memoized Label')
+        info = _slugify_label.cache_info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 1)
@@ -0,0 +1,66 @@
+import json
+
+from django.template import Context, Template
+from django.test import TestCase
+
+from wagtailstreamfieldforms.blocks import (
+    DateFormFieldBlock,
+    DropdownFormFieldBlock,
+    EmailFormFieldBlock,
+    SingleLineFormFieldBlock,
+)
+from wagtailstreamfieldforms.cache import content_form_class_cache, form_class_cache
+
+from .helpers import field_value, make_form_test_page
+
+
+class TestValidationRules(TestCase):
+
+    def test_single_line(self):
+        block = SingleLineFormFieldBlock()
+        value = block.to_python(field_value('Name', required=True, default_value=''))
+        self.assertEqual(block.get_validation_rules(value), {'required': True, 'max_length': 255})
+
+    def test_formats(self):
+        self.assertEqual(EmailFormFieldBlock().get_validation_rules(field_value('Email')),
+                         {'required': False, 'format': 'email'})
+        self.assertEqual(DateFormFieldBlock().get_validation_rules(field_value('Date')),
+                         {'required': False, 'format': 'date'})
+
+    def test_dropdown(self):
+        block = DropdownFormFieldBlock()
+        value = block.to_python(field_value(
+            'Colour',
+            choices=[{'key': 'r', 'description': 'Red'}, {'key': 'g', 'description': 'Green'}],
+            allow_multiple_selections=False,
+        ))
+        self.assertEqual(block.get_validation_rules(value), {
+            'required': False,
+            'choices': ['r', 'g'],
+            'multiple': False,
+        })
+
+
+class TestFormValidationRules(TestCase):
+
+    def setUp(self):
+        form_class_cache.clear()
+        content_form_class_cache.clear()
+        self.page = make_form_test_page()
+
+    def test_rules_are_built_once_per_form_class(self):
+        form_cls = self.page.get_form_class()
+        self.assertEqual(form_cls.validation_rules, {
+            'name': {'required': True, 'max_length': 255},
+            'email': {'required': False, 'format': 'email'},
+        })
+        self.assertIs(self.page.get_form().validation_rules, form_cls.validation_rules)
+
+    def test_template_tag(self):
+        template = Template(
+            '{% load wagtailstreamfieldforms %}{% form_validation_rules form "rules" %}'
+        )
+        html = template.render(Context({'form': self.page.get_form()}))
+        self.assertTrue(html.startswith('<script id="rules" type="application/json">'))
+        data = html[html.index('>') + 1:html.rindex('</script>')]
+        self.assertEqual(json.loads(data)['email'], {'required': False, 'format': 'email'})
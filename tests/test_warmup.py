@@ -0,0 +1,37 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from wagtail.core.models import Page
+
+from wagtailstreamfieldforms.cache import form_class_cache
+from wagtailstreamfieldforms.models import FormSchema
+from wagtailstreamfieldforms.warmup import get_live_form_pages, warm_form_pages
+
+from .helpers import make_form_test_page
+
+
+class TestWarmFormPages(TestCase):
+
+    def setUp(self):
+        self.live_page = make_form_test_page()
+        self.draft_page = make_form_test_page(slug='draft', publish=False)
+        FormSchema.objects.all().delete()
+        form_class_cache.clear()
+
+    def test_get_live_form_pages(self):
+        self.assertEqual(list(get_live_form_pages()), [self.live_page])
+
+    def test_warm_form_pages(self):
+        self.assertEqual(warm_form_pages(), 1)
+        form_schema = FormSchema.objects.get()
+        self.assertEqual(form_schema.page_id, self.live_page.pk)
+        self.assertEqual(form_schema.revision_id, self.live_page.live_revision_id)
+        self.assertIn((self.live_page.pk, self.live_page.live_revision_id), form_class_cache)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('warm_form_schemas', stdout=out)
+        self.assertIn('Warmed 1 form pages.', out.getvalue())
+        self.assertTrue(FormSchema.objects.filter(page=self.live_page).exists())
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class WagtailStreamFieldFormsAppConfig(AppConfig):
     name = 'wagtailstreamfieldforms'
     default_auto_field = 'django.db.models.AutoField'
+
+    def ready(self):
+        from .signal_handlers import register_signal_handlers
+        register_signal_handlers()
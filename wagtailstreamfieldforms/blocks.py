@@ -1,16 +1,26 @@
 import django.forms
+from django.urls import NoReverseMatch, reverse
 from django.utils.html import format_html, format_html_join
 from django.utils.text import slugify
 
 from wagtail.core.blocks import (
     BooleanBlock,
     CharBlock,
+    ChoiceBlock,
     DeclarativeSubBlocksMetaclass,
     ListBlock,
     StructBlock
 )
 
-from .forms import formfieldblocks
+from .cache import fragment_cache
+from .choices import choicesources, get_choice_source_choices
+from .forms import (
+    ChoiceSourceField,
+    IndexedChoiceField,
+    IndexedMultipleChoiceField,
+    MultipleChoiceSourceField,
+    formfieldblocks,
+)
 from .utils import create_field_id
 
 # TODO: consider form validation???
@@ -25,6 +35,17 @@ class FormFieldBlockMixin(object, metaclass=DeclarativeSubBlocksMetaclass):
     label = CharBlock()
     required = BooleanBlock(default=False, required=False)
     help_text = CharBlock(required=False)
+    condition_field = CharBlock(
+        required=False,
+        help_text='Only show this field when the field with this label has the condition value.',
+    )
+    condition_value = CharBlock(
+        required=False,
+        help_text='Leave empty to show this field when the other field has any value.',
+    )
+
+    # the value format checked by the client side validator, e.g. 'email' or 'date'
+    validation_format = None
 
     def get_field_options(self, field):
         options = {}
@@ -33,10 +54,57 @@ class FormFieldBlockMixin(object, metaclass=DeclarativeSubBlocksMetaclass):
         options['required'] = field['required']
         return options
 
-    def create_field(self, field):
-        options = self.get_field_options(field)
+    def get_condition(self, field):
+        '''Returns a (field id, value) tuple of the field this field depends on or None if it is always active.'''
+        label = field.get('condition_field')
+        if not label:
+            return None
+        return (create_field_id(label), field.get('condition_value') or '')
+
+    def create_field(self, field, options=None):
+        '''Creates the Django form field for the passed in block value.
+
+        options - the result of get_field_options(field) if it is already known.
+        '''
+        if options is None:
+            options = self.get_field_options(field)
         return django.forms.CharField(**options)
 
+    def get_validation_rules(self, field, options=None):
+        '''Returns a JSON serializable description of the checks a browser can make before the form is posted.
+
+        options - the result of get_field_options(field) if it is already known.
+        '''
+        if options is None:
+            options = self.get_field_options(field)
+        rules = {'required': bool(options.get('required'))}
+        if options.get('max_length') is not None:
+            rules['max_length'] = options['max_length']
+        if self.validation_format is not None:
+            rules['format'] = self.validation_format
+        if 'choices' in options:
+            rules['choices'] = [str(key) for key, description in options['choices']]
+        return rules
+
+    def get_field_schema(self, field, form_field, options=None):
+        '''Returns a JSON serializable description of the form field for frontends rendering the form themselves.
+
+        form_field - the Django form field created for the block value.
+        options - the result of get_field_options(field) if it is already known.
+        '''
+        if options is None:
+            options = self.get_field_options(field)
+        schema = dict(options)
+        widget = form_field.widget
+        schema['widget'] = widget.__class__.__name__
+        input_type = getattr(widget, 'input_type', None)
+        if input_type is not None:
+            schema['input_type'] = input_type
+        if 'choices' in schema:
+            schema['choices'] = [list(choice) for choice in schema['choices']]
+            schema['multiple'] = widget.allow_multiple_selected
+        return schema
+
     def clean_name(self, value):
         '''Converts the label for this form field to a key used as the form element name.
 
@@ -47,19 +115,68 @@ class FormFieldBlockMixin(object, metaclass=DeclarativeSubBlocksMetaclass):
         # which will be converted to a normal str
         return create_field_id(value['label'])
 
+    def format_field(self, field):
+        '''Returns the HTML for a bound field.'''
+        return format_html(
+            '<div class="{}">{}{}</div>',
+            self.__class__.__name__.lower(),
+            field.label_tag(),
+            field
+        )
+
+    def get_jinja2_template(self):
+        '''Returns the name of the Jinja2 template used by the render_form_field function of the Jinja2 extension.
+
+        The template is named after the registered name of the block or of the
+        closest registered base class.
+        '''
+        for cls in self.__class__.__mro__:
+            name = formfieldblocks.lookup_name(cls)
+            if name is not None:
+                return 'wagtailstreamfieldforms/blocks/{0}.html'.format(name)
+        return 'wagtailstreamfieldforms/blocks/form_field.html'
+
+    def get_fragment_cache_key(self, form, name):
+        '''Returns the key to cache the HTML of an unbound field or None if it must not be cached.
+
+        Only unbound forms generated by FormBuilder without initial data are
+        the same for every visitor.
+        '''
+        content_hash = getattr(form, 'content_hash', None)
+        if content_hash is None or form.is_bound or form.initial:
+            return None
+        return (
+            content_hash,
+            name,
+            self.__class__.__name__,
+            form.prefix,
+            form.auto_id,
+            form.label_suffix,
+            form.use_required_attribute,
+        )
+
     def render_basic(self, value, context=None):
+        name = self.clean_name(value)
         if context:
             form = context['form']
         else:
             form = {
-                self.clean_name(value): self.create_field(value)
+                name: self.create_field(value)
             }
-        return format_html(
-            '<div class="{}">{}{}</div>',
-            self.__class__.__name__.lower(),
-            form[self.clean_name(value)].label_tag(),
-            form[self.clean_name(value)]
-        )
+            return self.format_field(form[name])
+
+        if name not in form.fields:
+            # the field belongs to another step of a multi-step form
+            return ''
+
+        key = self.get_fragment_cache_key(form, name) if fragment_cache.maxsize else None
+        if key is None:
+            return self.format_field(form[name])
+        html = fragment_cache.get(key)
+        if html is None:
+            html = self.format_field(form[name])
+            fragment_cache.set(key, html)
+        return html
 
     class Meta:
         icon = 'form'
@@ -93,44 +210,51 @@ class MultiLineFormFieldBlock(FormFieldBlockMixin, StructBlock):
         options['initial'] = field['default_value']
         return options
 
-    def create_field(self, field):
-        options = self.get_field_options(field)
+    def create_field(self, field, options=None):
+        if options is None:
+            options = self.get_field_options(field)
         return django.forms.CharField(widget=django.forms.Textarea, **options)
 
 
 @formfieldblocks.register('email')
 class EmailFormFieldBlock(FormFieldBlockMixin, StructBlock):
+    validation_format = 'email'
 
     class Meta:
         label = 'Email Field'
         icon = 'mail'
 
-    def create_field(self, field):
-        options = self.get_field_options(field)
+    def create_field(self, field, options=None):
+        if options is None:
+            options = self.get_field_options(field)
         return django.forms.EmailField(**options)
 
 
 @formfieldblocks.register('number')
 class NumberFormFieldBlock(FormFieldBlockMixin, StructBlock):
+    validation_format = 'number'
 
     class Meta:
         label = 'Number Field'
         icon = 'order'
 
-    def create_field(self, field):
-        options = self.get_field_options(field)
+    def create_field(self, field, options=None):
+        if options is None:
+            options = self.get_field_options(field)
         return django.forms.DecimalField(**options)
 
 
 @formfieldblocks.register('url')
 class UrlFormFieldBlock(FormFieldBlockMixin, StructBlock):
+    validation_format = 'url'
 
     class Meta:
         label = 'URL Field'
         icon = 'link'
 
-    def create_field(self, field):
-        options = self.get_field_options(field)
+    def create_field(self, field, options=None):
+        if options is None:
+            options = self.get_field_options(field)
         return django.forms.URLField(**options)
 
 
@@ -147,25 +271,35 @@ class CheckboxFormFieldBlock(FormFieldBlockMixin, StructBlock):
         options['initial'] = field['default_checked']
         return options
 
-    def create_field(self, field):
-        options = self.get_field_options(field)
+    def create_field(self, field, options=None):
+        if options is None:
+            options = self.get_field_options(field)
         return django.forms.BooleanField(**options)
 
-    def render_basic(self, value, context=None):
-        if context:
-            form = context['form']
-        else:
-            form = {
-                self.clean_name(value): self.create_field(value)
-            }
+    def format_field(self, field):
         return format_html(
             '<div class="{}">{}{}</div>',
             self.__class__.__name__.lower(),
-            form[self.clean_name(value)],
-            form[self.clean_name(value)].label_tag()
+            field,
+            field.label_tag()
         )
 
 
+class FormStepBlock(StructBlock):
+    '''Starts a new step of a multi-step form when used in the top level of a StreamField.
+
+    The fields following the block up to the next FormStepBlock belong to the step.
+    '''
+    title = CharBlock(required=False)
+
+    class Meta:
+        label = 'Form Step'
+        icon = 'order-down'
+
+    def render_basic(self, value, context=None):
+        return ''
+
+
 class FieldChoiceBlock(StructBlock):
     key = CharBlock(required=True)
     description = CharBlock(required=True)
@@ -189,12 +323,67 @@ class DropdownFormFieldBlock(FormFieldBlockMixin, StructBlock):
         options['choices'] = [(x['key'], x['description']) for x in field['choices']]
         return options
 
-    def create_field(self, field):
-        options = self.get_field_options(field)
+    def get_validation_rules(self, field, options=None):
+        rules = super(DropdownFormFieldBlock, self).get_validation_rules(field, options)
+        rules['multiple'] = bool(field['allow_multiple_selections'])
+        return rules
+
+    def create_field(self, field, options=None):
+        if options is None:
+            options = self.get_field_options(field)
         if field['allow_multiple_selections']:
-            return django.forms.MultipleChoiceField(**options)
+            return IndexedMultipleChoiceField(**options)
         else:
-            return django.forms.ChoiceField(**options)
+            return IndexedChoiceField(**options)
+
+
+@formfieldblocks.register('modeldropdown')
+class ModelDropdownFormFieldBlock(FormFieldBlockMixin, StructBlock):
+    '''A dropdown whose choices are loaded from a registered choice source instead of being stored in the block.'''
+    choice_source = ChoiceBlock(choices=get_choice_source_choices)
+    allow_multiple_selections = BooleanBlock(default=False, required=False)
+    autocomplete = BooleanBlock(
+        default=False,
+        required=False,
+        help_text='Only render the selected choices and search the others while typing.',
+    )
+
+    class Meta:
+        label = 'Model Dropdown Field'
+        icon = 'arrow-down-big'
+
+    def get_choices_url(self, field):
+        '''Returns the URL of the paginated choices of the source or None if the source cannot be searched.'''
+        if not choicesources.lookup(field['choice_source']).autocomplete:
+            return None
+        try:
+            return reverse('wagtailstreamfieldforms:choice_source', args=(field['choice_source'],))
+        except NoReverseMatch:
+            return None
+
+    def create_field(self, field, options=None):
+        if options is None:
+            options = self.get_field_options(field)
+        source = choicesources.lookup(field['choice_source'])
+        autocomplete_url = self.get_choices_url(field) if field['autocomplete'] else None
+        if field['allow_multiple_selections']:
+            return MultipleChoiceSourceField(choice_source=source, autocomplete_url=autocomplete_url, **options)
+        else:
+            return ChoiceSourceField(choice_source=source, autocomplete_url=autocomplete_url, **options)
+
+    def get_fragment_cache_key(self, form, name):
+        '''The choices of a source change without a new form schema so the field is always rendered.'''
+        return None
+
+    def get_field_schema(self, field, form_field, options=None):
+        schema = super(ModelDropdownFormFieldBlock, self).get_field_schema(field, form_field, options)
+        schema['choice_source'] = field['choice_source']
+        schema['choices_url'] = self.get_choices_url(field)
+        if schema['choices_url'] is None:
+            schema['choices'] = [list(choice) for choice in form_field.choices]
+        schema['autocomplete'] = bool(field['autocomplete'] and schema['choices_url'])
+        schema['multiple'] = bool(field['allow_multiple_selections'])
+        return schema
 
 
 @formfieldblocks.register('radio')
@@ -210,30 +399,35 @@ class RadioFormFieldBlock(FormFieldBlockMixin, StructBlock):
         options['choices'] = [(x['key'], x['description']) for x in field['choices']]
         return options
 
-    def create_field(self, field):
-        options = self.get_field_options(field)
-        return django.forms.ChoiceField(widget=django.forms.RadioSelect, **options)
+    def create_field(self, field, options=None):
+        if options is None:
+            options = self.get_field_options(field)
+        return IndexedChoiceField(widget=django.forms.RadioSelect, **options)
 
 
 @formfieldblocks.register('date')
 class DateFormFieldBlock(FormFieldBlockMixin, StructBlock):
+    validation_format = 'date'
 
     class Meta:
         label = 'Date Field'
         icon = 'date'
 
-    def create_field(self, field):
-        options = self.get_field_options(field)
+    def create_field(self, field, options=None):
+        if options is None:
+            options = self.get_field_options(field)
         return django.forms.DateField(**options)
 
 
 @formfieldblocks.register('datetime')
 class DateTimeFormFieldBlock(FormFieldBlockMixin, StructBlock):
+    validation_format = 'datetime'
 
     class Meta:
         label = 'Date & Time Field'
         icon = 'time'
 
-    def create_field(self, field):
-        options = self.get_field_options(field)
+    def create_field(self, field, options=None):
+        if options is None:
+            options = self.get_field_options(field)
         return django.forms.DateTimeField(**options)
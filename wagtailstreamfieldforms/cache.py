@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+DEFAULT_FORM_CLASS_CACHE_SIZE = 100
+
+
+class LRUCache(object):
+    '''A thread safe, size limited, least recently used cache.
+
+    maxsize - int or callable - the maximum number of entries to keep. A
+    callable is evaluated on every insert so the limit may come from settings.
+    '''
+    def __init__(self, maxsize):
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self):
+        if callable(self._maxsize):
+            return self._maxsize()
+        return self._maxsize
+
+    def get(self, key, default=None):
+        '''Return the value stored for key and mark it as recently used.'''
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        '''Store value for key evicting the least recently used entries if needed.'''
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            maxsize = self.maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def find(self, predicate):
+        '''Return the most recently used value whose key satisfies predicate without marking it as used.'''
+        with self._lock:
+            for key in reversed(self._data):
+                if predicate(key):
+                    return self._data[key]
+        return None
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_matching(self, predicate):
+        '''Remove every entry whose key satisfies predicate.'''
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        '''Remove all entries and reset the hit and miss counters.'''
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+def get_form_class_cache_size():
+    return getattr(settings, 'WAGTAILSTREAMFIELDFORMS_FORM_CLASS_CACHE_SIZE', DEFAULT_FORM_CLASS_CACHE_SIZE)
+
+
+# Per process cache of the PageForm of live pages keyed by (page id, live revision id).
+form_class_cache = LRUCache(get_form_class_cache_size)
+
+# Per process cache of generated form classes keyed by the content hash of their fields.
+content_form_class_cache = LRUCache(get_form_class_cache_size)
+
+
+def get_fragment_cache_size():
+    return getattr(settings, 'WAGTAILSTREAMFIELDFORMS_FRAGMENT_CACHE_SIZE', 0)
+
+
+# Per process cache of the HTML of unbound form fields. Disabled unless a size is configured.
+fragment_cache = LRUCache(get_fragment_cache_size)
+
+
+def find_page_form(page_id):
+    '''Return the most recently used PageForm generated for any revision of the page with the passed in id.'''
+    return form_class_cache.find(lambda key: key[0] == page_id)
+
+
+def invalidate_page(page_id):
+    '''Drop every cached form class generated for the page with the passed in id.'''
+    form_class_cache.delete_matching(lambda key: key[0] == page_id)
@@ -0,0 +1,124 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+
+class ModelChoiceSource(object):
+    '''Provides the choices of a dropdown field from the objects of a model or snippet.
+
+    The choices are loaded the first time they are needed and kept in the
+    process until an object of the model is saved or deleted in this process
+    or until WAGTAILSTREAMFIELDFORMS_CHOICE_CACHE_TIMEOUT seconds have passed
+    so changes made by other processes are picked up as well.
+
+    model - the model class holding the choices.
+    key_field - the name of the field used as the submitted value.
+    label_field - the name of the field used as the label. str(obj) is used if it is None.
+    queryset - callable - returns the queryset to load the choices from. Defaults to all objects of model.
+    autocomplete - allows anyone to search the choices through the choice source view. Blocks
+    only offer autocompletion for sources that allow it.
+    '''
+    def __init__(self, model, key_field='pk', label_field=None, queryset=None, autocomplete=False):
+        self.model = model
+        self.key_field = key_field
+        self.label_field = label_field
+        self.queryset = queryset
+        self.autocomplete = autocomplete
+        self._lock = threading.Lock()
+        self._loaded = None
+
+    def get_queryset(self):
+        if self.queryset is not None:
+            return self.queryset()
+        return self.model._default_manager.all()
+
+    def load_choices(self):
+        '''Returns a list of (key, label) tuples read from the database.'''
+        queryset = self.get_queryset()
+        if self.label_field is not None:
+            return [(str(key), str(label)) for key, label in queryset.values_list(self.key_field, self.label_field)]
+        return [(str(getattr(obj, self.key_field)), str(obj)) for obj in queryset]
+
+    def get_timeout(self):
+        return getattr(settings, 'WAGTAILSTREAMFIELDFORMS_CHOICE_CACHE_TIMEOUT', 300)
+
+    def is_current(self, loaded):
+        return loaded is not None and (loaded[0] is None or loaded[0] > time.monotonic())
+
+    def get_loaded(self):
+        '''Returns a tuple of the expiry time, the choices and a frozenset of their keys loading them if needed.'''
+        loaded = self._loaded
+        if not self.is_current(loaded):
+            with self._lock:
+                loaded = self._loaded
+                if not self.is_current(loaded):
+                    choices = self.load_choices()
+                    timeout = self.get_timeout()
+                    expires = time.monotonic() + timeout if timeout is not None else None
+                    loaded = (expires, choices, frozenset(key for key, label in choices))
+                    self._loaded = loaded
+        return loaded
+
+    def get_choices(self):
+        '''Returns the cached list of (key, label) tuples.'''
+        return self.get_loaded()[1]
+
+    def get_keys(self):
+        '''Returns a frozenset of the cached choice keys.'''
+        return self.get_loaded()[2]
+
+    def get_labels(self, keys):
+        '''Returns the (key, label) tuples of the choices with the passed in keys in choice order.'''
+        keys = set(str(key) for key in keys)
+        return [(key, label) for key, label in self.get_choices() if key in keys]
+
+    def search(self, term, offset=0, limit=20):
+        '''Returns the choices whose label contains term and whether more choices match.'''
+        term = term.lower()
+        matches = [choice for choice in self.get_choices() if term in choice[1].lower()]
+        return matches[offset:offset + limit], len(matches) > offset + limit
+
+    def __deepcopy__(self, memo):
+        # sources are shared by every field using them
+        return self
+
+    def invalidate(self, *args, **kwargs):
+        '''Drops the cached choices. Connected to post_save and post_delete of the model.'''
+        self._loaded = None
+
+
+class ChoiceSourceRegistry(object):
+    '''Registry holding the choice sources that can be selected for a ModelDropdownFormFieldBlock.'''
+    def __init__(self):
+        self.sources = {}
+        self.labels = {}
+
+    def register(self, name, source, label=None):
+        '''Register a choice source and invalidate its choices when objects of its model change.'''
+        if name in self.sources:
+            raise ValueError("Duplicate choice source name.")
+        self.sources[name] = source
+        self.labels[name] = label or name
+        post_save.connect(source.invalidate, sender=source.model, weak=False)
+        post_delete.connect(source.invalidate, sender=source.model, weak=False)
+
+    def lookup(self, name):
+        '''Return the choice source registered with the passed in name.'''
+        return self.sources[name]
+
+    def get_block_choices(self):
+        '''Returns the registered sources as choices for a ChoiceBlock.'''
+        return sorted(self.labels.items(), key=lambda item: str(item[1]))
+
+
+choicesources = ChoiceSourceRegistry()
+
+
+def get_choice_source_choices():
+    '''Returns the registered choice sources as choices for a ChoiceBlock.
+
+    A module level function so migrations can serialize it.
+    '''
+    return choicesources.get_block_choices()
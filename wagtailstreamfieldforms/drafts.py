@@ -0,0 +1,60 @@
+import json
+
+from django.conf import settings
+
+
+DRAFTS_SESSION_KEY = 'wagtailstreamfieldforms_drafts'
+
+
+def get_draft_max_size():
+    return getattr(settings, 'WAGTAILSTREAMFIELDFORMS_DRAFT_MAX_SIZE', 65536)
+
+
+def get_draft_limit():
+    return getattr(settings, 'WAGTAILSTREAMFIELDFORMS_DRAFT_LIMIT', 10)
+
+
+class DraftStore(object):
+    '''Keeps the data of unfinished multi-step forms in the session.
+
+    Every draft is stored as compact JSON holding the live revision id of the
+    page, the index of the current step and the submitted values of the
+    finished steps. Drafts of an older revision are discarded. A session keeps
+    at most WAGTAILSTREAMFIELDFORMS_DRAFT_LIMIT drafts and no draft may be
+    larger than WAGTAILSTREAMFIELDFORMS_DRAFT_MAX_SIZE characters.
+    '''
+    def __init__(self, session):
+        self.session = session
+
+    def get_key(self, page):
+        return str(page.pk)
+
+    def get(self, page):
+        '''Returns a tuple of the current step index and a dict mapping field names to lists of values.'''
+        drafts = self.session.get(DRAFTS_SESSION_KEY, {})
+        try:
+            revision_id, step, data = json.loads(drafts[self.get_key(page)])
+        except (KeyError, TypeError, ValueError):
+            return 0, {}
+        if revision_id != page.live_revision_id:
+            return 0, {}
+        return step, data
+
+    def save(self, page, step, data):
+        '''Stores the draft of page and returns False if it is too large to be stored.'''
+        draft = json.dumps([page.live_revision_id, step, data], separators=(',', ':'))
+        if len(draft) > get_draft_max_size():
+            return False
+        drafts = dict(self.session.get(DRAFTS_SESSION_KEY, {}))
+        key = self.get_key(page)
+        drafts.pop(key, None)
+        drafts[key] = draft
+        while len(drafts) > max(get_draft_limit(), 1):
+            del drafts[next(iter(drafts))]
+        self.session[DRAFTS_SESSION_KEY] = drafts
+        return True
+
+    def clear(self, page):
+        drafts = dict(self.session.get(DRAFTS_SESSION_KEY, {}))
+        if drafts.pop(self.get_key(page), None) is not None:
+            self.session[DRAFTS_SESSION_KEY] = drafts
@@ -1,9 +1,20 @@
-from collections import OrderedDict
+import copy
+import hashlib
+import inspect
+import json
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from types import MappingProxyType
 
 import django.forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 from wagtail.core.blocks import Block
 
+from .cache import content_form_class_cache
 from .utils import create_field_id
 
 
@@ -11,6 +22,8 @@ class FormFieldBlockRegistry(object):
     '''Registry holding a mapping of field names to Blocks that represent those fields.'''
     def __init__(self):
         self.field_types = {}
+        self.names = {}
+        self.blocks = {}
 
     def register(self, name: str, block: Block = None):
         '''Register a new form field Block class.'''
@@ -19,41 +32,493 @@ class FormFieldBlockRegistry(object):
         if block is None:
             def wrapper(cls):
                 self.field_types[name] = cls
+                self.names.setdefault(cls, name)
                 return cls
             return wrapper
         else:
             self.field_types[name] = block
+            self.names.setdefault(block, name)
 
     def lookup_type(self, name):
         '''Return a Block class based on the passed in form field type name.'''
         return self.field_types[name]
 
+    def lookup_name(self, block_class):
+        '''Return the name a Block class was registered with or None if it is not registered.
+
+        Subclasses of registered blocks are not matched because they may create different fields.
+        '''
+        return self.names.get(block_class)
+
+    def get_block(self, name):
+        '''Return a shared instance of the Block class registered with the passed in name.'''
+        if name not in self.blocks:
+            self.blocks[name] = self.lookup_type(name)()
+        return self.blocks[name]
+
 
 formfieldblocks = FormFieldBlockRegistry()
 
 
-class BlockField(object):
-    '''Represents a field specified by a block in a StreamField.'''
+# create_field methods that accept the precomputed field options keyed by block class.
+_create_field_takes_options = {}
+
+
+def create_field_takes_options(block):
+    '''Returns True if create_field of block accepts the field options as second argument.
+
+    Blocks written before the options were added override create_field(self, field).
+    '''
+    block_class = block.__class__
+    try:
+        return _create_field_takes_options[block_class]
+    except KeyError:
+        pass
+    try:
+        parameters = list(inspect.signature(block.create_field).parameters.values())
+    except (TypeError, ValueError):
+        parameters = []
+    takes_options = any(
+        parameter.name == 'options' or parameter.kind == parameter.VAR_POSITIONAL
+        for parameter in parameters
+    ) or len([
+        parameter for parameter in parameters
+        if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)
+    ]) > 1
+    _create_field_takes_options[block_class] = takes_options
+    return takes_options
+
+
+class FieldSpec(object):
+    '''Immutable description of the form field created by a block value.
+
+    The field options, field id and registered field type are computed once
+    when the spec is created instead of every time they are needed.
+    '''
+    __slots__ = ('block', 'value', 'options', 'field_id', 'field_type')
+
     def __init__(self, block, value):
+        options = block.get_field_options(value)
+        object.__setattr__(self, 'block', block)
+        object.__setattr__(self, 'value', value)
+        object.__setattr__(self, 'options', MappingProxyType(options))
+        object.__setattr__(self, 'field_id', create_field_id(options['label']))
+        object.__setattr__(self, 'field_type', formfieldblocks.lookup_name(block.__class__))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('FieldSpec instances are immutable.')
+
+    def __delattr__(self, name):
+        raise AttributeError('FieldSpec instances are immutable.')
+
+    def create_field(self):
+        '''Creates a new Django form field from the precomputed options.'''
+        if create_field_takes_options(self.block):
+            return self.block.create_field(self.value, dict(self.options))
+        return self.block.create_field(self.value)
+
+
+class BlockField(object):
+    '''Represents a field specified by a block in a StreamField.
+
+    block_id is the id of the closest StreamField child containing the field if it is known.
+    '''
+    def __init__(self, block, value, block_id=None):
         self.block = block
         self.value = value
+        self.block_id = block_id
+        self._spec = None
+
+    @property
+    def spec(self):
+        '''The FieldSpec of this field which is computed on first access.'''
+        if self._spec is None:
+            self._spec = FieldSpec(self.block, self.value)
+        return self._spec
 
     def get_form_field(self):
-        return self.block.create_field(self.value)
+        return self.spec.create_field()
 
     def get_field_id(self):
-        opts = self.block.get_field_options(self.value)
-        return create_field_id(opts['label'])
+        return self.spec.field_id
+
+
+class IndexedChoiceMixin(object):
+    '''Checks submitted values against a set of the choice keys instead of scanning the choices.
+
+    The index is built when the choices are set so copies of the field made
+    for each form instance share it. Callable choices are not indexed.
+    '''
+    choice_index = None
+
+    def _set_choices(self, value):
+        super(IndexedChoiceMixin, self)._set_choices(value)
+        if isinstance(self._choices, list):
+            self.choice_index = frozenset(self.iter_choice_keys(self._choices))
+        else:
+            self.choice_index = None
+
+    choices = property(django.forms.ChoiceField._get_choices, _set_choices)
+
+    def iter_choice_keys(self, choices):
+        for key, value in choices:
+            if isinstance(value, (list, tuple)):
+                # an optgroup holding choices
+                for group_key, group_value in value:
+                    yield str(group_key)
+            else:
+                yield str(key)
+
+    def valid_value(self, value):
+        if self.choice_index is None:
+            return super(IndexedChoiceMixin, self).valid_value(value)
+        return str(value) in self.choice_index
+
+
+class IndexedChoiceField(IndexedChoiceMixin, django.forms.ChoiceField):
+    pass
+
+
+class IndexedMultipleChoiceField(IndexedChoiceMixin, django.forms.MultipleChoiceField):
+    pass
+
+
+class ChoiceSourceWidgetMixin(object):
+    '''Renders the choices of a choice source.
+
+    With an autocomplete_url only the selected choices are rendered and the
+    URL is added as the data-autocomplete-url attribute for a script loading
+    the other choices while typing.
+    '''
+    def __init__(self, attrs=None, choice_source=None, autocomplete_url=None):
+        super(ChoiceSourceWidgetMixin, self).__init__(attrs)
+        self.choice_source = choice_source
+        self.autocomplete_url = autocomplete_url
+        if autocomplete_url is not None:
+            self.attrs['data-autocomplete-url'] = autocomplete_url
+
+    def optgroups(self, name, value, attrs=None):
+        if self.autocomplete_url is None:
+            return super(ChoiceSourceWidgetMixin, self).optgroups(name, value, attrs)
+        widget = copy.copy(self)
+        widget.choices = self.choice_source.get_labels(value)
+        return super(ChoiceSourceWidgetMixin, widget).optgroups(name, value, attrs)
+
+
+class ChoiceSourceSelect(ChoiceSourceWidgetMixin, django.forms.Select):
+    pass
+
+
+class ChoiceSourceSelectMultiple(ChoiceSourceWidgetMixin, django.forms.SelectMultiple):
+    pass
+
+
+class ChoiceSourceMixin(object):
+    '''Loads the choices of a field from a choice source when they are first needed.
+
+    Submitted values are checked against the cached set of keys of the source.
+    '''
+    def __init__(self, *, choice_source, autocomplete_url=None, **kwargs):
+        self.choice_source = choice_source
+        kwargs['choices'] = choice_source.get_choices
+        kwargs['widget'] = self.widget(choice_source=choice_source, autocomplete_url=autocomplete_url)
+        super(ChoiceSourceMixin, self).__init__(**kwargs)
+
+    def valid_value(self, value):
+        return str(value) in self.choice_source.get_keys()
+
+
+class ChoiceSourceField(ChoiceSourceMixin, django.forms.ChoiceField):
+    widget = ChoiceSourceSelect
+
+
+class MultipleChoiceSourceField(ChoiceSourceMixin, django.forms.MultipleChoiceField):
+    widget = ChoiceSourceSelectMultiple
+
+
+class LazyFields(dict):
+    '''The fields of a form instance that share the fields of the form class until they are accessed.
+
+    Rendering and validating a form only read its fields, so the fields are
+    only copied when they are accessed with fields[name], fields.get(name),
+    fields.values() or fields.items(), which is how fields are changed for a
+    single form instance. BaseForm reads the fields inside reading_fields()
+    so Django's form machinery does not copy them.
+    '''
+    def __init__(self, base_fields):
+        super(LazyFields, self).__init__(base_fields)
+        self.copied = set()
+        self.reading = 0
+
+    def __getitem__(self, name):
+        field = dict.__getitem__(self, name)
+        if name not in self.copied and not self.reading:
+            field = copy.deepcopy(field)
+            dict.__setitem__(self, name, field)
+            self.copied.add(name)
+        return field
+
+    def __setitem__(self, name, field):
+        dict.__setitem__(self, name, field)
+        self.copied.add(name)
+
+    def __deepcopy__(self, memo):
+        return {name: copy.deepcopy(field, memo) for name, field in dict.items(self)}
+
+    def get(self, name, default=None):
+        if name in self:
+            return self[name]
+        return default
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    def values(self):
+        return [self[name] for name in self]
+
+    def pop(self, name, *args):
+        if name not in self:
+            return dict.pop(self, name, *args)
+        field = self[name]
+        dict.__delitem__(self, name)
+        self.copied.discard(name)
+        return field
+
+    def peek(self, name):
+        '''Returns the field with the passed in name without copying it. The field must not be changed.'''
+        return dict.__getitem__(self, name)
+
+
+@contextmanager
+def reading_fields(fields):
+    '''Lets the fields of a form be read without copying the fields shared with the form class.'''
+    if not isinstance(fields, LazyFields):
+        yield
+        return
+    fields.reading += 1
+    try:
+        yield
+    finally:
+        fields.reading -= 1
+
+
+class LazyBaseFields(dict):
+    '''The base_fields of form classes built by FormBuilder.
+
+    Forms deep copy base_fields for every instance. When
+    WAGTAILSTREAMFIELDFORMS_LAZY_FORM_FIELDS is enabled the copy is a
+    LazyFields instance that only copies the fields which are looked up by name.
+    '''
+    def __deepcopy__(self, memo):
+        if getattr(settings, 'WAGTAILSTREAMFIELDFORMS_LAZY_FORM_FIELDS', False):
+            return LazyFields(self)
+        return {name: copy.deepcopy(field, memo) for name, field in self.items()}
+
+
+def condition_matches(value, expected):
+    '''Returns True when a cleaned field value satisfies the value of a condition.
+
+    An empty expected value matches any non empty value. Lists match when one
+    of their items matches and booleans match "true" or "false".
+    '''
+    if value in django.forms.Field.empty_values or (value is False and expected == ''):
+        return False
+    if expected == '':
+        return True
+    if isinstance(value, (list, tuple)):
+        return any(str(item) == expected for item in value)
+    if isinstance(value, bool):
+        return ('true' if value else 'false') == expected.lower()
+    return str(value) == expected
 
 
 class BaseForm(django.forms.Form):
+    # maps the id of a StreamField child to the ids of the form fields it holds, passed in per page
+    block_fields = {}
+    # maps field ids to the client side validation rules of their blocks
+    validation_rules = {}
+    # maps field ids to the (field id, value) condition that makes them active
+    field_conditions = {}
+    # field ids ordered so fields are validated after the fields they depend on
+    validation_order = None
+
     def __init__(self, *args, **kwargs):
         kwargs.setdefault('label_suffix', '')
 
         self.user = kwargs.pop('user', None)
         self.page = kwargs.pop('page', None)
+        field_names = kwargs.pop('field_names', None)
+        block_fields = kwargs.pop('block_fields', None)
+        if block_fields is not None:
+            self.block_fields = block_fields
+        # cleaned values of fields that are not in this form but that conditions depend on
+        self.condition_values = kwargs.pop('condition_values', None) or {}
 
         super(BaseForm, self).__init__(*args, **kwargs)
+        self._block_index = None
+        if field_names is not None:
+            # only keep the fields of one step of a multi-step form
+            field_names = set(field_names)
+            fields_class = LazyFields if isinstance(self.fields, LazyFields) else dict
+            with reading_fields(self.fields):
+                self.fields = fields_class((name, field) for name, field in self.fields.items() if name in field_names)
+            self.validation_rules = self.get_step_validation_rules()
+
+    def __getitem__(self, name):
+        '''Returns the bound field with the passed in name without copying shared fields.'''
+        if not isinstance(self.fields, LazyFields) or name not in self.fields:
+            return super(BaseForm, self).__getitem__(name)
+        field = self.fields.peek(name)
+        bound_field = self._bound_fields_cache.get(name)
+        if bound_field is None or bound_field.field is not field:
+            bound_field = field.get_bound_field(self, name)
+            self._bound_fields_cache[name] = bound_field
+        return bound_field
+
+    def _clean_fields(self):
+        '''Validates only the active fields in the order of their dependencies.
+
+        Fields whose condition is not met are inactive. They are not validated
+        and are left out of cleaned_data so they are not stored either.
+        cleaned_data is kept in form order so submissions store their values
+        in that order.
+        '''
+        with reading_fields(self.fields):
+            fields = OrderedDict(self.fields.items())
+        if not self.field_conditions:
+            for name, field in fields.items():
+                self.clean_field(name, field)
+            return
+        order = [name for name in self.validation_order if name in fields]
+        ordered = set(order)
+        order.extend(name for name in fields if name not in ordered and name not in self.field_conditions)
+        self.inactive_fields = set()
+        for name in order:
+            if not self.is_field_active(name):
+                self.inactive_fields.add(name)
+                continue
+            self.clean_field(name, fields[name])
+        cleaned_data = self.cleaned_data
+        self.cleaned_data = {name: cleaned_data[name] for name in fields if name in cleaned_data}
+
+    def is_field_active(self, name):
+        '''Returns True when the field has no condition or its condition is met.
+
+        Conditions depending on a field of this form are checked against the
+        cleaned data, all others against condition_values.
+        '''
+        condition = self.field_conditions.get(name)
+        if condition is None:
+            return True
+        field_id, expected = condition
+        values = self.cleaned_data if field_id in self.fields else self.condition_values
+        return field_id in values and condition_matches(values[field_id], expected)
+
+    def get_step_validation_rules(self):
+        '''Returns the client side validation rules of the fields of a step.
+
+        Conditions depending on a field of another step cannot be checked by
+        the browser, so they are marked as met or not met.
+        '''
+        rules = OrderedDict()
+        for name in self.fields:
+            rule = self.validation_rules.get(name)
+            if rule is None:
+                continue
+            condition = rule.get('condition')
+            if condition is not None and condition['field'] not in self.fields:
+                rule = dict(rule, condition=dict(condition, met=self.is_field_active(name)))
+            rules[name] = rule
+        return rules
+
+    def clean_field(self, name, field):
+        if field.disabled:
+            value = self.get_initial_for_field(field, name)
+        else:
+            value = field.widget.value_from_datadict(self.data, self.files, self.add_prefix(name))
+        try:
+            if isinstance(field, django.forms.FileField):
+                value = field.clean(value, self.get_initial_for_field(field, name))
+            else:
+                value = field.clean(value)
+            self.cleaned_data[name] = value
+            if hasattr(self, 'clean_%s' % name):
+                self.cleaned_data[name] = getattr(self, 'clean_%s' % name)()
+        except ValidationError as e:
+            self.add_error(name, e)
+
+    def _html_output(self, *args, **kwargs):
+        with reading_fields(self.fields):
+            return super(BaseForm, self)._html_output(*args, **kwargs)
+
+    @cached_property
+    def changed_data(self):
+        with reading_fields(self.fields):
+            return super(BaseForm, self).changed_data
+
+    @property
+    def media(self):
+        with reading_fields(self.fields):
+            return super(BaseForm, self).media
+
+    def is_multipart(self):
+        with reading_fields(self.fields):
+            return super(BaseForm, self).is_multipart()
+
+    def order_fields(self, field_order):
+        if field_order is not None and isinstance(self.fields, LazyFields):
+            self.fields = copy.deepcopy(self.fields)
+        super(BaseForm, self).order_fields(field_order)
+
+    def get_block_index(self):
+        '''Returns a dict mapping StreamField child ids to their bound field.
+
+        Only children holding exactly one form field are included. The index is
+        built once per form instance.
+        '''
+        if self._block_index is None:
+            self._block_index = {
+                block_id: self[field_ids[0]]
+                for block_id, field_ids in self.block_fields.items()
+                if len(field_ids) == 1 and field_ids[0] in self.fields
+            }
+        return self._block_index
+
+    def get_block_field(self, block):
+        '''Returns the bound field for a StreamField child or form field block value.
+
+        block - StreamChild or block value - StreamChildren are found by their id
+        in the block index. Other values are found by the field id generated from
+        their label.
+        '''
+        block_id = getattr(block, 'id', None)
+        if block_id is not None:
+            bound_field = self.get_block_index().get(block_id)
+            if bound_field is not None:
+                return bound_field
+        value = getattr(block, 'value', block)
+        try:
+            field_id = create_field_id(value['label'])
+        except (KeyError, TypeError):
+            return None
+        if field_id in self.fields:
+            return self[field_id]
+        return None
+
+
+class PageForm(object):
+    '''The form class of a page revision with the data that depends on the block ids of that page.
+
+    Form classes are shared by every page with identical fields, so they
+    cannot hold anything that depends on the StreamField of one page.
+
+    field_sources - dict mapping (block id, field id) to the spec of the field.
+    block_fields - dict mapping StreamField child ids to the ids of the form fields they hold.
+    '''
+    def __init__(self, form_class, field_sources, block_fields):
+        self.form_class = form_class
+        self.field_sources = field_sources
+        self.block_fields = block_fields
 
 
 class FormBuilder(object):
@@ -70,9 +535,157 @@ class FormBuilder(object):
             fields[field.get_field_id()] = field.get_form_field()
         return fields
 
-    def get_form_class(self):
-        '''Creates a Form class based on the fields passed in at initialization.'''
-        # TODO: consider only creating the class on the first call an then
-        # returning the originally created class on subsequent calls to save
-        # cycles and to prevent class type conflicts.
-        return type('StreamForm', (BaseForm,), self.formfields)
+    def get_block_fields(self):
+        '''Returns a dict mapping StreamField child ids to the ids of the form fields they hold.'''
+        block_fields = {}
+        for field in self.fields:
+            if field.block_id is not None:
+                block_fields.setdefault(field.block_id, []).append(field.spec.field_id)
+        return block_fields
+
+    def get_field_spec(self, field):
+        '''Returns a normalized JSON description of a field used to detect identical fields.'''
+        spec = field.spec
+        block_class = spec.block.__class__
+        return json.dumps([
+            spec.field_id,
+            '{0}.{1}'.format(block_class.__module__, block_class.__qualname__),
+            dict(spec.options),
+            spec.block.get_prep_value(spec.value),
+        ], cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+
+    def get_field_conditions(self):
+        '''Returns a dict mapping field ids to the (field id, value) condition that makes them active.
+
+        Conditions referring to unknown fields are ignored so those fields are
+        always active. The same happens to the first condition of a cycle in
+        field order which breaks the cycle.
+        '''
+        field_ids = set(field.spec.field_id for field in self.fields)
+        conditions = {}
+        for field in self.fields:
+            condition = field.spec.block.get_condition(field.spec.value)
+            if condition is not None and condition[0] in field_ids:
+                conditions[field.spec.field_id] = condition
+        for field_id in list(conditions):
+            seen = set()
+            current = field_id
+            while current in conditions and current not in seen:
+                seen.add(current)
+                current = conditions[current][0]
+            if current == field_id:
+                del conditions[field_id]
+        return conditions
+
+    def get_validation_order(self, conditions):
+        '''Returns the field ids sorted so every field comes after the field its condition depends on.'''
+        dependents = {}
+        for field_id, (parent_id, expected) in conditions.items():
+            dependents.setdefault(parent_id, []).append(field_id)
+        order = []
+        queue = deque(field.spec.field_id for field in self.fields if field.spec.field_id not in conditions)
+        seen = set()
+        while queue:
+            field_id = queue.popleft()
+            if field_id in seen:
+                continue
+            seen.add(field_id)
+            order.append(field_id)
+            queue.extend(dependents.get(field_id, ()))
+        return order
+
+    def get_validation_rules(self, conditions=None):
+        '''Returns a dict mapping field ids to the client side validation rules of their blocks.'''
+        rules = OrderedDict()
+        for field in self.fields:
+            spec = field.spec
+            rules[spec.field_id] = spec.block.get_validation_rules(spec.value, spec.options)
+            if conditions and spec.field_id in conditions:
+                field_id, expected = conditions[spec.field_id]
+                rules[spec.field_id]['condition'] = {'field': field_id, 'value': expected}
+        return rules
+
+    def get_field_specs(self):
+        return [self.get_field_spec(field) for field in self.fields]
+
+    def get_content_hash(self, specs=None):
+        '''Returns a stable hash of the field specs that is shared by all forms with identical fields.'''
+        if specs is None:
+            specs = self.get_field_specs()
+        return hashlib.sha1('\n'.join(specs).encode('utf-8')).hexdigest()
+
+    def get_unique_fields(self, specs):
+        '''Returns an OrderedDict mapping field ids to (BlockField, spec) tuples.
+
+        The last field with an id wins like in formfields.
+        '''
+        fields = OrderedDict()
+        for field, spec in zip(self.fields, specs):
+            fields[field.spec.field_id] = (field, spec)
+        return fields
+
+    def get_field_sources(self, specs=None):
+        '''Returns a dict mapping the (block id, field id) of every field with a known block id to its spec.'''
+        if specs is None:
+            specs = self.get_field_specs()
+        return {
+            (field.block_id, field_id): spec
+            for field_id, (field, spec) in self.get_unique_fields(specs).items()
+            if field.block_id is not None
+        }
+
+    def get_form_class(self, previous_page_form=None, specs=None):
+        '''Creates a Form class based on the fields passed in at initialization.
+
+        Form classes are shared by content hash so every form with identical
+        fields uses the same class.
+
+        previous_page_form - PageForm built for an earlier revision of the same
+        page. Fields whose block id and spec did not change reuse the Django
+        field of its class instead of creating it again.
+        '''
+        if specs is None:
+            specs = self.get_field_specs()
+        content_hash = self.get_content_hash(specs)
+        form_cls = content_form_class_cache.get(content_hash)
+        if form_cls is None:
+            previous_sources = previous_page_form.field_sources if previous_page_form is not None else {}
+            formfields = OrderedDict()
+            for field_id, (field, spec) in self.get_unique_fields(specs).items():
+                if field.block_id is not None and previous_sources.get((field.block_id, field_id)) == spec:
+                    formfields[field_id] = previous_page_form.form_class.base_fields[field_id]
+                else:
+                    formfields[field_id] = field.get_form_field()
+            form_cls = type('StreamForm', (BaseForm,), formfields)
+            form_cls.base_fields = LazyBaseFields(form_cls.base_fields)
+            form_cls.content_hash = content_hash
+            conditions = self.get_field_conditions()
+            form_cls.field_conditions = conditions
+            form_cls.validation_order = self.get_validation_order(conditions)
+            form_cls.validation_rules = self.get_validation_rules(conditions)
+            content_form_class_cache.set(content_hash, form_cls)
+        return form_cls
+
+    def get_page_form(self, previous_page_form=None):
+        '''Returns a PageForm holding the shared form class and the block ids of these fields.'''
+        specs = self.get_field_specs()
+        return PageForm(
+            self.get_form_class(previous_page_form, specs),
+            self.get_field_sources(specs),
+            self.get_block_fields(),
+        )
+
+    def get_json_schema(self, form_class):
+        '''Returns a JSON serializable description of the fields of form_class in form order.
+
+        form_class - the Form class built from the same fields by get_form_class.
+        '''
+        fields = OrderedDict()
+        for field in self.fields:
+            spec = field.spec
+            schema = spec.block.get_field_schema(spec.value, form_class.base_fields[spec.field_id], spec.options)
+            schema['name'] = spec.field_id
+            schema['type'] = spec.field_type
+            schema['validation'] = form_class.validation_rules.get(spec.field_id, {})
+            fields[spec.field_id] = schema
+        return {'fields': list(fields.values())}
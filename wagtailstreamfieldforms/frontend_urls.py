@@ -0,0 +1,10 @@
+from django.conf.urls import url
+
+from .views import ChoiceSourceView, FormSchemaView, FormSubmissionView, csrf_token
+
+urlpatterns = [
+    url(r'^csrf-token/$', csrf_token, name="csrf_token"),
+    url(r'^pages/(?P<page_id>[0-9]+)/form/$', FormSchemaView.as_view(), name="form_schema"),
+    url(r'^pages/(?P<page_id>[0-9]+)/submissions/$', FormSubmissionView.as_view(), name="form_submission"),
+    url(r'^choices/(?P<name>[\w-]+)/$', ChoiceSourceView.as_view(), name="choice_source"),
+]
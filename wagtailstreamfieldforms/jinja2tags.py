@@ -0,0 +1,43 @@
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from .blocks import FormFieldBlockMixin
+from .templatetags.wagtailstreamfieldforms import form_validation_rules, get_form_field, unslugify
+
+
+class WagtailStreamFieldFormsExtension(Extension):
+    '''Provides the wagtailstreamfieldforms template tags to Jinja2 templates.
+
+    Usage: {% set field = get_form_field(block, form) %}
+           {{ render_form_field(block, form) }}
+    '''
+    def __init__(self, environment):
+        super(WagtailStreamFieldFormsExtension, self).__init__(environment)
+
+        self.environment.globals.update({
+            'get_form_field': get_form_field,
+            'form_validation_rules': form_validation_rules,
+            'render_form_field': self.render_form_field,
+        })
+        self.environment.filters.update({
+            'unslugify': unslugify,
+        })
+
+    def render_form_field(self, block, form):
+        '''Renders the field of a StreamField child with the Jinja2 template of its block.
+
+        Returns an empty string for children that are not form fields and for
+        fields of other steps of a multi-step form.
+        '''
+        field_block = getattr(block, 'block', None)
+        if not isinstance(field_block, FormFieldBlockMixin):
+            return ''
+        name = field_block.clean_name(block.value)
+        if name not in form.fields:
+            return ''
+        template = self.environment.get_template(field_block.get_jinja2_template())
+        return Markup(template.render(field=form[name], css_class=field_block.__class__.__name__.lower()))
+
+
+# Nicer import names
+forms = WagtailStreamFieldFormsExtension
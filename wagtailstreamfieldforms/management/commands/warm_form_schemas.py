@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from wagtailstreamfieldforms.warmup import warm_form_pages
+
+
+class Command(BaseCommand):
+    help = "Compiles and caches the form schema of every live form page."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='The number of processes used to compile the form schemas.')
+
+    def handle(self, **options):
+        count = warm_form_pages(workers=options['workers'])
+        self.stdout.write("Warmed %d form pages." % count)
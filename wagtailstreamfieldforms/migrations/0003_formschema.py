@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-17 13:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0040_page_draft_title'),
+        ('wagtailstreamfieldforms', '0002_remove_submissionfield_field_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormSchema',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fields', models.TextField()),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='form_schema', to='wagtailcore.page')),
+                ('revision', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='wagtailcore.pagerevision')),
+            ],
+        ),
+    ]
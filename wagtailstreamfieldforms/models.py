@@ -1,17 +1,26 @@
+import hashlib
 import json
 import os.path
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.serializers.json import DjangoJSONEncoder
-from django.shortcuts import render
+from django.http import QueryDict
+from django.shortcuts import redirect, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 
 from wagtail.core.blocks import ListBlock, StreamBlock, StructBlock
 from wagtail.core.fields import StreamField
-from wagtail.core.models import Page
+from wagtail.core.models import Page, PageRevision
+from wagtail.core.url_routing import RouteResult
 
-from .blocks import FormFieldBlockMixin
-from .forms import BlockField, FormBuilder
+from .blocks import FormFieldBlockMixin, FormStepBlock
+from .cache import find_page_form, form_class_cache
+from .drafts import DraftStore
+from .forms import BlockField, ChoiceSourceMixin, FormBuilder
+from . import page_cache, schema
 
 
 class Submission(models.Model):
@@ -43,10 +52,196 @@ class SubmissionField(models.Model):
         return '{0}: {1}'.format(self.field_name, self.field_value)
 
 
-class FormFieldFinder(object):
-    '''Class that handles finding all nested form fields recursively.
+class FormSchema(models.Model):
+    '''Holds the compiled form field specs of the live revision of a form page.
+
+    The specs are created by wagtailstreamfieldforms.schema.compile_form_fields
+    when a page is published so the form can be rebuilt without traversing the
+    StreamFields of the page.
+    '''
+    page = models.OneToOneField(Page, on_delete=models.CASCADE, related_name='form_schema')
+    revision = models.ForeignKey(PageRevision, on_delete=models.CASCADE, blank=True, null=True)
+    fields = models.TextField()
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return 'Form Schema - {0}'.format(self.page_id)
+
+    def get_form_fields(self):
+        '''Returns the BlockField instances described by the stored specs.'''
+        return schema.load_form_fields(schema.loads(self.fields))
+
+
+# Returned by BlockHandlerRegistry.lookup for blocks that are form fields.
+FORM_FIELD_BLOCK = 'form_field_block'
+
+
+class BlockHandlerRegistry(object):
+    '''Registry mapping container Block classes to functions returning their children.
+
+    A handler is called with the finder, the block and the block value and
+    returns an iterable of (block, value, block_id) tuples. Handlers are found
+    by walking the MRO of a block class once; the result is cached so every
+    following lookup for that class is a single dict lookup.
+
+    The registry also knows the child block definitions of container blocks so
+    it can tell which blocks can never contain a form field. Containers
+    without a registered definition function are assumed to contain form fields.
+    '''
+    def __init__(self):
+        self.handlers = {}
+        self.resolved = {}
+        self.definitions = {}
+        self.resolved_definitions = {}
+        self.reachable = {}
+
+    def register(self, block_class, handler=None):
+        '''Register a handler for a Block class and its subclasses.'''
+        if handler is None:
+            def wrapper(func):
+                self.register(block_class, func)
+                return func
+            return wrapper
+        self.handlers[block_class] = handler
+        self.resolved.clear()
+        self.reachable.clear()
+
+    def register_definition(self, block_class, definition=None):
+        '''Register a function returning the child block definitions of a container Block class.'''
+        if definition is None:
+            def wrapper(func):
+                self.register_definition(block_class, func)
+                return func
+            return wrapper
+        self.definitions[block_class] = definition
+        self.resolved_definitions.clear()
+        self.reachable.clear()
+
+    def lookup_definition(self, block_class):
+        '''Return the function returning the child block definitions of a Block class or None.'''
+        try:
+            return self.resolved_definitions[block_class]
+        except KeyError:
+            pass
+
+        definition = None
+        for cls in block_class.__mro__:
+            if cls in self.definitions:
+                definition = self.definitions[cls]
+                break
+        self.resolved_definitions[block_class] = definition
+        return definition
+
+    def contains_form_fields(self, block):
+        '''Returns True if a block definition is a form field or can contain one at any depth.
+
+        The result is computed once per block instance. The definitions are
+        walked with an explicit stack so deeply nested definitions are allowed.
+        '''
+        cached = self.reachable.get(id(block))
+        if cached is not None:
+            return cached[1]
+
+        result = False
+        # every entry is [block, iterator of child definitions, found a form field]
+        stack = [[block, None, False]]
+        while stack:
+            entry = stack[-1]
+            if entry[1] is None:
+                current = entry[0]
+                cached = self.reachable.get(id(current))
+                handler = self.lookup(current.__class__)
+                definition = self.lookup_definition(current.__class__)
+                if cached is not None:
+                    result = cached[1]
+                elif handler is None:
+                    result = False
+                elif handler == FORM_FIELD_BLOCK or definition is None:
+                    result = True
+                else:
+                    # guard against recursive definitions while the children are checked
+                    self.reachable[id(current)] = (current, True)
+                    entry[1] = iter(definition(current))
+                    continue
+                self.reachable[id(current)] = (current, result)
+                stack.pop()
+            else:
+                child = None if entry[2] else next(entry[1], None)
+                if child is not None:
+                    stack.append([child, None, False])
+                    continue
+                result = entry[2]
+                self.reachable[id(entry[0])] = (entry[0], result)
+                stack.pop()
+            if stack:
+                stack[-1][2] = stack[-1][2] or result
+        return result
+
+    def lookup(self, block_class):
+        '''Return the handler for a Block class, FORM_FIELD_BLOCK for form fields or None.'''
+        try:
+            return self.resolved[block_class]
+        except KeyError:
+            pass
+
+        handler = None
+        if issubclass(block_class, FormFieldBlockMixin):
+            handler = FORM_FIELD_BLOCK
+        else:
+            for cls in block_class.__mro__:
+                if cls in self.handlers:
+                    handler = self.handlers[cls]
+                    break
+        self.resolved[block_class] = handler
+        return handler
+
+
+blockhandlers = BlockHandlerRegistry()
+
+
+@blockhandlers.register(StreamBlock)
+def stream_block_children(finder, block, value):
+    return finder.iter_stream_block(block, value)
+
+
+@blockhandlers.register(StructBlock)
+def struct_block_children(finder, block, value):
+    return finder.iter_struct_block(block, value)
+
+
+@blockhandlers.register(ListBlock)
+def list_block_children(finder, block, value):
+    return finder.iter_list_block(block, value)
+
+
+@blockhandlers.register_definition(StreamBlock)
+@blockhandlers.register_definition(StructBlock)
+def child_blocks_definition(block):
+    return block.child_blocks.values()
 
-    Adding to this class requires adding new handle methods and overriding the find_form_fields function.
+
+@blockhandlers.register_definition(ListBlock)
+def child_block_definition(block):
+    return [block.child_block]
+
+
+class FormFieldFinder(object):
+    '''Class that handles finding all nested form fields.
+
+    Form fields can be found in two ways. iter_form_fields walks the blocks with
+    an explicit stack and yields the fields one at a time so deeply nested
+    blocks do not hit the recursion limit. The children of container blocks
+    come from the handlers in the block_handlers registry, so a special block
+    with child blocks only needs a handler and no new finder class:
+
+        @blockhandlers.register(SpecialBlock)
+        def special_block_children(finder, block, value):
+            return ((block.block, val, None) for val in value)
+
+    find_form_fields finds the fields recursively. Adding to it requires adding
+    new handle methods and overriding the find_form_fields function. Finders
+    that override find_form_fields, handle_struct_block, handle_stream_block
+    or handle_list_block are always traversed recursively.
     If you have a special form field that needs special handling:
 
         class SpecialFormFieldFinder(FormFieldFinder):
@@ -75,6 +270,8 @@ class FormFieldFinder(object):
                     return super(SpecialFormFieldFinder, self).find_form_fields(block, value)
     '''
 
+    block_handlers = blockhandlers
+
     def handle_form_field_block(self, block, value):
         '''This is the base case and allows the recursion to stop.'''
         if isinstance(block, FormFieldBlockMixin):
@@ -93,7 +290,10 @@ class FormFieldFinder(object):
         '''Handles looping through StreamBlock values.'''
         form_fields = []
         for val in value:
-            form_fields += self.find_form_fields(val.block, val.value)
+            for field in self.find_form_fields(val.block, val.value):
+                if field.block_id is None:
+                    field.block_id = val.id
+                form_fields.append(field)
         return form_fields
 
     def handle_list_block(self, block, value):
@@ -103,6 +303,89 @@ class FormFieldFinder(object):
             form_fields += self.find_form_fields(block.child_block, val)
         return form_fields
 
+    def iter_struct_block(self, block, value):
+        '''Yields the children of a StructBlock.'''
+        for key in block.child_blocks:
+            yield block.child_blocks[key], value[key], None
+
+    def iter_stream_block(self, block, value):
+        '''Yields the children of a StreamBlock with their block ids.
+
+        Lazy StreamValues still hold the raw JSON data of their children. Only
+        the children whose block can contain form fields are converted to Python
+        values; all others are skipped without being decoded.
+        '''
+        if not (getattr(value, 'is_lazy', False) and hasattr(value, 'raw_data')):
+            for val in value:
+                yield val.block, val.value, val.id
+            return
+
+        contains_form_fields = self.block_handlers.contains_form_fields
+        for i, item in enumerate(value.raw_data):
+            child_block = block.child_blocks.get(item['type'])
+            if child_block is not None and contains_form_fields(child_block):
+                val = value[i]
+                yield val.block, val.value, val.id
+
+    def iter_list_block(self, block, value):
+        '''Yields the children of a ListBlock.'''
+        for val in value:
+            yield block.child_block, val, None
+
+    def iter_children(self, block, value):
+        '''Returns an iterable of (block, value, block_id) tuples for the children of a container block.
+
+        None is returned for blocks that cannot contain form fields.
+        '''
+        handler = self.block_handlers.lookup(block.__class__)
+        if handler is None or handler == FORM_FIELD_BLOCK:
+            return None
+        return handler(self, block, value)
+
+    # Overriding any of these methods makes the finder traverse blocks recursively.
+    recursive_methods = ('find_form_fields', 'handle_struct_block', 'handle_stream_block', 'handle_list_block')
+
+    def is_recursive(self):
+        '''Returns True for finders that override find_form_fields or a container handle method.
+
+        Those overrides are only called by the recursive traversal.
+        '''
+        cls = type(self)
+        return any(getattr(cls, name) is not getattr(FormFieldFinder, name) for name in self.recursive_methods)
+
+    def iter_form_fields(self, block, value):
+        '''Lazily yields all form fields using an explicit stack instead of recursion.
+
+        Container blocks whose definition cannot hold a form field are skipped.
+        '''
+        if self.is_recursive():
+            yield from self.find_form_fields(block, value)
+            return
+
+        lookup = self.block_handlers.lookup
+        contains_form_fields = self.block_handlers.contains_form_fields
+        stack = [(iter([(block, value, None)]), None)]
+        while stack:
+            children, parent_block_id = stack[-1]
+            try:
+                child_block, child_value, block_id = next(children)
+            except StopIteration:
+                stack.pop()
+                continue
+            if block_id is None:
+                block_id = parent_block_id
+
+            handler = lookup(child_block.__class__)
+            if handler is None:
+                continue
+            elif handler == FORM_FIELD_BLOCK:
+                for field in self.handle_form_field_block(child_block, child_value):
+                    if field.block_id is None:
+                        field.block_id = block_id
+                    yield field
+            elif contains_form_fields(child_block):
+                stack.append((iter(handler(self, child_block, child_value)), block_id))
+
     def find_form_fields(self, block, value):
         '''Finds all form fields by determining block type and recursively
         calling various handle methods for each block type.
@@ -119,9 +402,30 @@ class FormFieldFinder(object):
             return []
 
 
+# StreamFields that can contain form fields keyed by Page class and block handler registry.
+_form_stream_fields = {}
+
+
+class FormStep(object):
+    '''A step of a multi-step form holding the ids of its fields in form order.'''
+    def __init__(self, title=None):
+        self.title = title
+        self.index = 0
+        self.field_ids = []
+
+
 class AbstractFormPage(Page):
     '''The base class for all Pages that will have a StreamField based form on them.'''
 
+    # Set to True to cache the rendered page for anonymous GET requests.
+    cache_form_page = False
+
+    # Set to True to answer conditional GET requests with 304 Not Modified responses.
+    conditional_form_page = False
+
+    # Set to True to redirect to a cacheable thank-you URL after a valid submission.
+    redirect_after_submission = False
+
     def __init__(self, *args, **kwargs):
         super(AbstractFormPage, self).__init__(*args, **kwargs)
         if not hasattr(self, 'form_submitted_template'):
@@ -141,37 +445,152 @@ class AbstractFormPage(Page):
 
     def get_form_builder(self):
         '''Return the FormBuilder instance used to create the form class.'''
-        return FormBuilder(self.get_form_fields())
+        form_fields = self.get_compiled_form_fields()
+        if form_fields is None:
+            form_fields = self.get_form_fields()
+        return FormBuilder(form_fields)
+
+    def compile_form_schema(self):
+        '''Stores the compiled form field specs of this page for its live revision.
+
+        Returns the FormSchema instance or None if the form cannot be compiled.
+        '''
+        return self.save_form_schema(schema.compile_form_fields(self.get_form_fields()))
+
+    def save_form_schema(self, specs):
+        '''Stores already compiled form field specs for the live revision of this page.'''
+        live_revision_id = getattr(self, 'live_revision_id', None)
+        if self.pk is not None and live_revision_id is not None:
+            schema.set_cached_schema(self.pk, live_revision_id, schema.dumps(specs))
+        if specs is None or self.pk is None:
+            FormSchema.objects.filter(page_id=self.pk).delete()
+            return None
+        form_schema, created = FormSchema.objects.update_or_create(
+            page_id=self.pk,
+            defaults={
+                'revision_id': live_revision_id,
+                'fields': schema.dumps(specs),
+            }
+        )
+        return form_schema
+
+    def get_form_schema_data(self, compile=False):
+        '''Returns the serialized form field specs for the live revision of this page.
+
+        The specs are read from the stored FormSchema. If there is none the specs
+        are compiled from the StreamFields when compile is True and None is
+        returned otherwise.
+        '''
+        data = FormSchema.objects.filter(
+            page_id=self.pk, revision_id=self.live_revision_id
+        ).values_list('fields', flat=True).first()
+        if data is None and compile:
+            data = schema.dumps(schema.compile_form_fields(self.get_form_fields()))
+        return data
+
+    def get_compiled_form_fields(self):
+        '''Returns the BlockField instances from the compiled schema of the live revision.
+
+        When WAGTAILSTREAMFIELDFORMS_SCHEMA_CACHE is set the compiled schema is
+        shared through that Django cache. None is returned if there is no
+        compiled schema for the live revision or the page is not showing its
+        live content.
+        '''
+        key = self.get_form_class_cache_key()
+        if key is None:
+            return None
+        if schema.get_schema_cache() is None:
+            data = self.get_form_schema_data()
+        else:
+            data = schema.get_or_compile_schema(self.pk, key[1], lambda: self.get_form_schema_data(compile=True))
+        if data is None:
+            return None
+        specs = schema.loads(data)
+        if specs is None:
+            return None
+        return schema.load_form_fields(specs)
+
+    def get_form_stream_fields(self, finder):
+        '''Returns the StreamFields of this Page class whose blocks can contain form fields.
+
+        The result is computed once per Page class and block handler registry.
+        '''
+        key = (self.__class__, id(finder.block_handlers), finder.is_recursive())
+        if key not in _form_stream_fields:
+            _form_stream_fields[key] = [
+                field for field in self.__class__._meta.get_fields()
+                if isinstance(field, StreamField) and (
+                    finder.is_recursive() or finder.block_handlers.contains_form_fields(field.stream_block)
+                )
+            ]
+        return _form_stream_fields[key]
 
     def get_form_fields(self):
         '''Finds form fields in all StreamField instances of every database field for this Page record.'''
         finder = self.get_form_field_finder()
         form_fields = []
-        for field in self.__class__._meta.get_fields():
-            if isinstance(field, StreamField):
-                form_fields += finder.find_form_fields(field.stream_block, getattr(self, field.name))
+        for field in self.get_form_stream_fields(finder):
+            form_fields.extend(finder.iter_form_fields(field.stream_block, getattr(self, field.name)))
         return form_fields
 
+    def get_form_class_cache_key(self):
+        '''Returns the key used to cache the form class or None if the form class must not be cached.
+
+        Only the live content of a page can be cached because previews and
+        unsaved pages share the page id and revision with the live version.
+        '''
+        live_revision_id = getattr(self, 'live_revision_id', None)
+        if self.pk is None or live_revision_id is None or getattr(self, 'is_form_preview', False):
+            return None
+        return (self.pk, live_revision_id)
+
+    def get_page_form(self, previous_page_form=None):
+        '''Creates and returns the PageForm holding the form class and the field sources of this page.
+
+        When the PageForm of an earlier revision of this page is still cached
+        the unchanged fields of its class are reused.
+        '''
+        key = self.get_form_class_cache_key()
+        if key is None:
+            return self.get_form_builder().get_page_form(previous_page_form)
+
+        page_form = form_class_cache.get(key)
+        if page_form is None:
+            if previous_page_form is None:
+                previous_page_form = find_page_form(self.pk)
+            page_form = self.get_form_builder().get_page_form(previous_page_form)
+            form_class_cache.set(key, page_form)
+        return page_form
+
     def get_form_class(self):
         '''Creates and returns the Form class to use for managing the dyanmic form on this page.'''
-        return self.get_form_builder().get_form_class()
+        return self.get_page_form().form_class
 
     def get_form(self, form_data=None, file_data=None, **kwargs):
         '''Returns the form instance to use for this Page.'''
-        form_cls = self.get_form_class()
-        return form_cls(form_data, file_data, **kwargs)
+        page_form = self.get_page_form()
+        kwargs.setdefault('block_fields', page_form.block_fields)
+        return page_form.form_class(form_data, file_data, **kwargs)
 
     def process_form_submission(self, form):
-        '''Handles the storing of information for a valid form submission.'''
-        sub = Submission()
-        sub.page = self
-        sub.save()
-        for key in form.cleaned_data:
-            sub_field = SubmissionField()
-            sub_field.submission = sub
-            sub_field.field_name = key
-            sub_field.field_value = json.dumps(form.cleaned_data[key], cls=DjangoJSONEncoder)
-            sub_field.save()
+        '''Handles the storing of information for a valid form submission.
+
+        The submission and all of its fields are written in one transaction
+        with one query for the submission and one per batch of fields. Most
+        backends insert all fields in one batch, SQLite inserts at most 333.
+        '''
+        with transaction.atomic(savepoint=False):
+            sub = Submission()
+            sub.page = self
+            sub.save()
+            SubmissionField.objects.bulk_create([
+                SubmissionField(
+                    submission=sub,
+                    field_name=key,
+                    field_value=json.dumps(value, cls=DjangoJSONEncoder),
+                )
+                for key, value in form.cleaned_data.items()
+            ])
         return sub
 
     def get_context(self, request, *args, **kwargs):
@@ -186,14 +605,336 @@ class AbstractFormPage(Page):
         })
         return context
 
+    def serve_preview(self, request, mode_name):
+        '''Marks the page as a preview so the cached live form class is not used.'''
+        self.is_form_preview = True
+        return super(AbstractFormPage, self).serve_preview(request, mode_name)
+
+    def get_page_cache_key(self, request):
+        '''Returns the key used to cache the rendered page or None if the response must not be cached.
+
+        Only anonymous GET and HEAD requests without a query string for the
+        live revision are cached because nothing else in the context of those
+        requests differs between visitors except the CSRF token.
+        '''
+        if not self.cache_form_page or request.method not in ('GET', 'HEAD') or request.GET:
+            return None
+        if self.has_form_steps():
+            return None
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return None
+        key = self.get_form_class_cache_key()
+        if key is None or self.uses_choice_sources():
+            return None
+        return page_cache.get_page_cache_key(key[0], key[1], self.get_template(request), request.get_host())
+
+    def uses_choice_sources(self):
+        '''Returns True when the form has fields whose choices are loaded from a choice source.
+
+        Those choices change without a new revision so pages showing them are
+        neither cached nor answered with 304 Not Modified.
+        '''
+        return any(isinstance(field, ChoiceSourceMixin) for field in self.get_form_class().base_fields.values())
+
+    def get_form_page_etag(self, request):
+        '''Returns the ETag of the page for the passed in request or None if conditional requests are not answered.
+
+        The rendered page only changes when a revision is published, so the
+        ETag is built from the live revision, which determines the form schema,
+        and the template. The CSRF token embedded in the page is only valid for
+        the visitor's CSRF cookie and user so both are part of the ETag too.
+        '''
+        if not self.conditional_form_page or request.method not in ('GET', 'HEAD') or self.has_form_steps():
+            return None
+        key = self.get_form_class_cache_key()
+        if key is None or self.uses_choice_sources():
+            return None
+        user = getattr(request, 'user', None)
+        parts = [
+            key[0],
+            key[1],
+            self.get_template(request),
+            request.get_host(),
+            request.get_full_path(),
+            user.pk if user is not None and user.is_authenticated else '',
+            page_cache.get_csrf_secret(request),
+        ]
+        return quote_etag(hashlib.sha1('\n'.join(str(part) for part in parts).encode('utf-8')).hexdigest())
+
+    def get_form_page_last_modified(self):
+        '''Returns the time the live revision was published as a timestamp or None if it is unknown.'''
+        if self.last_published_at is None:
+            return None
+        return int(self.last_published_at.timestamp())
+
+    def route(self, request, path_components):
+        '''Routes the submitted/<revision id>/ path of the page to its thank-you page.'''
+        is_submitted_path = len(path_components) == 2 and path_components[0] == 'submitted'
+        if self.redirect_after_submission and self.live and is_submitted_path:
+            return RouteResult(self, kwargs={'submitted_revision': path_components[1]})
+        return super(AbstractFormPage, self).route(request, path_components)
+
+    def get_submitted_url(self, request):
+        '''Returns the thank-you URL of the live revision or None if the page has no URL.'''
+        url = self.get_url(request)
+        if url is None or self.live_revision_id is None:
+            return None
+        return '{0}/submitted/{1}/'.format(url.rstrip('/'), self.live_revision_id)
+
+    def get_submitted_context(self, request):
+        '''Returns the context of the thank-you page which does not include the form.'''
+        return super(AbstractFormPage, self).get_context(request)
+
+    def get_submitted_response(self, request, context=None):
+        '''Returns the response for a valid submission.
+
+        With redirect_after_submission the visitor is redirected to the
+        thank-you URL so refreshing the page does not submit the form again.
+        '''
+        url = self.get_submitted_url(request) if self.redirect_after_submission else None
+        if url is not None:
+            return redirect(url)
+        if context is None:
+            context = self.get_context(request)
+        return render(request, self.get_form_submitted_template(request), context)
+
+    def serve_submitted(self, request, revision_id):
+        '''Renders the thank-you page of a revision.
+
+        The page only depends on the revision in the URL, so responses to
+        anonymous visitors may be cached for
+        WAGTAILSTREAMFIELDFORMS_SUBMITTED_MAX_AGE seconds unless the page has
+        view restrictions.
+        '''
+        if revision_id != str(self.live_revision_id):
+            return redirect(self.get_submitted_url(request))
+        response = render(request, self.get_form_submitted_template(request), self.get_submitted_context(request))
+        user = getattr(request, 'user', None)
+        if (user is None or not user.is_authenticated) and not self.get_view_restrictions().exists():
+            max_age = getattr(settings, 'WAGTAILSTREAMFIELDFORMS_SUBMITTED_MAX_AGE', 3600)
+            patch_cache_control(response, public=True, max_age=max_age)
+        return response
+
     def serve(self, request, *args, **kwargs):
         '''Handles serving the Page on the front-end of the website.'''
+        if 'submitted_revision' in kwargs:
+            return self.serve_submitted(request, kwargs['submitted_revision'])
+
+        etag = self.get_form_page_etag(request)
+        if etag is not None:
+            last_modified = self.get_form_page_last_modified()
+            # If-Modified-Since alone cannot tell whether the cached page holds a valid CSRF token
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = self.render_form_page(request)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+            return response
+        return self.render_form_page(request)
+
+    def iter_form_stream_children(self):
+        '''Yields the block, id and value of every top level child of the StreamFields holding form fields.
+
+        The values of lazy StreamValues are their raw JSON data.
+        '''
+        finder = self.get_form_field_finder()
+        for field in self.get_form_stream_fields(finder):
+            stream = getattr(self, field.name)
+            if getattr(stream, 'is_lazy', False) and hasattr(stream, 'raw_data'):
+                for item in stream.raw_data:
+                    yield field.stream_block.child_blocks.get(item['type']), item.get('id'), item['value']
+            else:
+                for child in stream:
+                    yield child.block, child.id, child.value
+
+    def has_form_steps(self):
+        '''Returns True when a StreamField of the page holds a FormStepBlock.'''
+        return any(isinstance(block, FormStepBlock) for block, block_id, value in self.iter_form_stream_children())
+
+    def get_form_steps(self):
+        '''Returns the steps of the form as a list of FormStep instances.
+
+        Every FormStepBlock in the top level of a StreamField starts a new step
+        and fields belong to the step of the StreamField child holding them.
+        Steps without fields are left out, so a form without FormStepBlocks has
+        one step holding all fields.
+        '''
+        steps = [FormStep()]
+        child_steps = {}
+        for block, block_id, value in self.iter_form_stream_children():
+            if isinstance(block, FormStepBlock):
+                steps.append(FormStep(value.get('title') or None))
+            elif block_id is not None:
+                child_steps[block_id] = len(steps) - 1
+
+        current = 0
+        seen = set()
+        for field in self.get_form_builder().fields:
+            current = child_steps.get(field.block_id, current)
+            field_id = field.get_field_id()
+            if field_id not in seen:
+                seen.add(field_id)
+                steps[current].field_ids.append(field_id)
+
+        steps = [step for step in steps if step.field_ids]
+        for index, step in enumerate(steps):
+            step.index = index
+        return steps
+
+    def get_draft_store(self, request):
+        '''Returns the DraftStore keeping the data of unfinished multi-step forms.'''
+        return DraftStore(request.session)
+
+    def get_step_form(self, request, step, data=None, initial=None, condition_values=None):
+        '''Returns a form holding only the fields of a step.
+
+        condition_values - the cleaned values of earlier steps returned by get_step_condition_values.
+        '''
+        return self.get_form(
+            data, None, page=self, user=request.user, initial=initial, field_names=step.field_ids,
+            condition_values=condition_values,
+        )
+
+    def get_draft_data(self, data):
+        '''Converts the values stored in the draft store to a QueryDict.'''
+        query_dict = QueryDict(mutable=True)
+        for name, values in data.items():
+            query_dict.setlist(name, values)
+        return query_dict
+
+    def get_step_condition_values(self, request, steps, step, data):
+        '''Returns the cleaned values of the earlier steps that conditions of fields in step depend on.'''
+        conditions = self.get_form_class().field_conditions
+        if not any(name in conditions and conditions[name][0] not in step.field_ids for name in step.field_ids):
+            return {}
+        names = [name for earlier in steps[:step.index] for name in earlier.field_ids]
+        form = self.get_form(self.get_draft_data(data), None, page=self, user=request.user, field_names=names)
+        form.is_valid()
+        return form.cleaned_data
+
+    def get_draft_initial(self, step, data):
+        '''Converts the stored values of a step to initial values of its form.'''
+        initial = {}
+        base_fields = self.get_form_class().base_fields
+        for name in step.field_ids:
+            if name in data and name in base_fields:
+                multiple = getattr(base_fields[name].widget, 'allow_multiple_selected', False)
+                initial[name] = data[name] if multiple else data[name][0]
+        return initial
+
+    def render_form_step(self, request, steps):
+        '''Renders the current step of a multi-step form and stores the submission after the last step.
+
+        Only the fields of the posted step are validated. The values of finished
+        steps are kept in the draft store and the complete form is validated
+        and processed once after the last step.
+        '''
+        store = self.get_draft_store(request)
+        index, data = store.get(self)
+        index = min(index, len(steps) - 1)
+        context = self.get_context(request)
+        form = None
+
+        if request.method == 'POST':
+            try:
+                index = max(0, min(int(request.POST.get('form_step', index)), index))
+            except ValueError:
+                pass
+            posted_index = index
+            step = steps[index]
+            data = {name: values for name, values in data.items() if name not in step.field_ids}
+            data.update((name, request.POST.getlist(name)) for name in step.field_ids if name in request.POST)
+
+            if 'form_previous' in request.POST:
+                index = max(index - 1, 0)
+            else:
+                form = self.get_step_form(
+                    request, step, request.POST,
+                    condition_values=self.get_step_condition_values(request, steps, step, data),
+                )
+                if form.is_valid():
+                    if index == len(steps) - 1:
+                        complete_data = self.get_draft_data(data)
+                        complete_form = self.get_form(complete_data, None, page=self, user=request.user)
+                        if complete_form.is_valid():
+                            self.process_form_submission(complete_form)
+                            store.clear(self)
+                            context['form'] = complete_form
+                            return self.get_submitted_response(request, context)
+                        index = next(
+                            (s.index for s in steps if any(name in complete_form.errors for name in s.field_ids)),
+                            index,
+                        )
+                        form = self.get_step_form(
+                            request, steps[index], complete_data,
+                            condition_values=self.get_step_condition_values(request, steps, steps[index], data),
+                        )
+                        form.is_valid()
+                        for name, errors in complete_form.errors.items():
+                            if name == '__all__' or (name in form.fields and name not in form.errors):
+                                form.add_error(None if name == '__all__' else name, list(errors))
+                    else:
+                        index += 1
+                        form = None
+
+            if not store.save(self, index, data):
+                index = posted_index
+                form = self.get_step_form(
+                    request, steps[index], request.POST,
+                    condition_values=self.get_step_condition_values(request, steps, steps[index], data),
+                )
+                form.is_valid()
+                form.add_error(None, 'There is too much data in this form to continue.')
+
+        if form is None:
+            form = self.get_step_form(
+                request, steps[index], initial=self.get_draft_initial(steps[index], data),
+                condition_values=self.get_step_condition_values(request, steps, steps[index], data),
+            )
+        context.update({
+            'form': form,
+            'form_step': steps[index],
+            'form_steps': steps,
+        })
+        return render(request, self.get_template(request), context)
+
+    def render_form_page(self, request):
+        '''Renders the page or the submitted template for valid submissions and returns the response.'''
+        if self.has_form_steps():
+            steps = self.get_form_steps()
+            if len(steps) > 1:
+                return self.render_form_step(request, steps)
+
+        if request.method == 'POST' and self.redirect_after_submission:
+            # validate and store the submission without building the page context
+            form = self.get_form(request.POST, request.FILES, page=self, user=request.user)
+            if form.is_valid():
+                self.process_form_submission(form)
+                return self.get_submitted_response(request)
+            context = self.get_context(request)
+            context['form'] = form
+            return render(request, self.get_template(request), context)
+
+        cache_key = self.get_page_cache_key(request)
+        if cache_key is not None:
+            response = page_cache.get_cached_response(request, cache_key)
+            if response is not None:
+                return response
+
         context = self.get_context(request)
         if request.method == 'POST':
             form = context['form']
             if form.is_valid():
                 self.process_form_submission(form)
 
-                return render(request, self.get_form_submitted_template(request), context)
+                return self.get_submitted_response(request, context)
+
+        if cache_key is not None:
+            context['csrf_token'] = page_cache.CSRF_TOKEN_PLACEHOLDER
+            response = render(request, self.get_template(request), context)
+            return page_cache.cache_response(request, cache_key, response)
 
         return render(request, self.get_template(request), context)
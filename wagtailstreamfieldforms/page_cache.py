@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import CSRF_SESSION_KEY, get_token
+
+
+# Rendered in place of the CSRF token when a page is rendered for the page cache.
+CSRF_TOKEN_PLACEHOLDER = 'wagtailstreamfieldforms-csrf-token'
+
+
+def get_page_cache():
+    '''Returns the Django cache used to store rendered form pages.'''
+    return caches[getattr(settings, 'WAGTAILSTREAMFIELDFORMS_PAGE_CACHE', 'default')]
+
+
+def get_page_cache_key(page_id, revision_id, template, host):
+    return 'wagtailstreamfieldforms:page:{0}:{1}:{2}:{3}'.format(page_id, revision_id, template, host)
+
+
+def substitutes_csrf_token():
+    '''Returns True when the placeholder is replaced with the CSRF token of the request before responding.
+
+    When disabled cached pages are returned with the placeholder so a reverse
+    proxy may cache them and the token is fetched from the csrf_token view.
+    '''
+    return getattr(settings, 'WAGTAILSTREAMFIELDFORMS_PAGE_CACHE_SUBSTITUTE_TOKEN', True)
+
+
+def get_csrf_secret(request):
+    '''Returns the CSRF secret stored for the client making the request or an empty string.'''
+    if settings.CSRF_USE_SESSIONS:
+        session = getattr(request, 'session', None)
+        return session.get(CSRF_SESSION_KEY, '') if session is not None else ''
+    return request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+
+
+def make_response(request, content, content_type):
+    if substitutes_csrf_token():
+        content = content.replace(CSRF_TOKEN_PLACEHOLDER.encode(), get_token(request).encode())
+    return HttpResponse(content, content_type=content_type)
+
+
+def get_cached_response(request, key):
+    '''Returns a response for the cached page stored under key or None if the page is not cached.'''
+    cached = get_page_cache().get(key)
+    if cached is None:
+        return None
+    content, content_type = cached
+    return make_response(request, content, content_type)
+
+
+def cache_response(request, key, response):
+    '''Stores a page rendered with the CSRF token placeholder and returns the response to send.'''
+    if response.status_code != 200:
+        return response
+    content_type = response['Content-Type']
+    timeout = getattr(settings, 'WAGTAILSTREAMFIELDFORMS_PAGE_CACHE_TIMEOUT', None)
+    get_page_cache().set(key, (response.content, content_type), timeout)
+    return make_response(request, response.content, content_type)
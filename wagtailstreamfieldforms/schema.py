@@ -0,0 +1,105 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .forms import BlockField, formfieldblocks
+
+
+def compile_form_fields(form_fields):
+    '''Converts a list of BlockField instances to a JSON serializable list of field specs.
+
+    Each spec holds the field id, the name the block was registered with in
+    formfieldblocks, the stored block value and the id of the StreamField child
+    holding the field. None is returned when one of
+    the blocks is not registered because the form could not be rebuilt from
+    the specs.
+    '''
+    specs = []
+    for field in form_fields:
+        if field.spec.field_type is None:
+            return None
+        specs.append({
+            'id': field.spec.field_id,
+            'type': field.spec.field_type,
+            'value': field.block.get_prep_value(field.value),
+            'block_id': field.block_id,
+        })
+    return specs
+
+
+def load_form_fields(specs):
+    '''Converts a list of field specs created by compile_form_fields back to BlockField instances.'''
+    form_fields = []
+    for spec in specs:
+        block = formfieldblocks.get_block(spec['type'])
+        form_fields.append(BlockField(block, block.to_python(spec['value']), spec.get('block_id')))
+    return form_fields
+
+
+def dumps(specs):
+    return json.dumps(specs, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+def loads(data):
+    return json.loads(data)
+
+
+def get_schema_cache():
+    '''Returns the Django cache used to share compiled schemas between processes or None if it is disabled.'''
+    alias = getattr(settings, 'WAGTAILSTREAMFIELDFORMS_SCHEMA_CACHE', None)
+    if alias is None:
+        return None
+    return caches[alias]
+
+
+def get_schema_cache_key(page_id, revision_id):
+    return 'wagtailstreamfieldforms:schema:{0}:{1}'.format(page_id, revision_id)
+
+
+def set_cached_schema(page_id, revision_id, data):
+    '''Stores serialized specs for a page revision in the shared schema cache if it is enabled.'''
+    cache = get_schema_cache()
+    if cache is not None:
+        timeout = getattr(settings, 'WAGTAILSTREAMFIELDFORMS_SCHEMA_CACHE_TIMEOUT', None)
+        cache.set(get_schema_cache_key(page_id, revision_id), data, timeout)
+
+
+def get_or_compile_schema(page_id, revision_id, compile_schema):
+    '''Returns the serialized specs for a page revision from the shared schema cache.
+
+    compile_schema - callable - returns the serialized specs and is only called
+    by the process holding the compile lock for the page revision. Other
+    processes wait for the result to show up in the cache and only compile the
+    specs themselves when the lock holder does not finish in time.
+    '''
+    cache = get_schema_cache()
+    if cache is None:
+        return compile_schema()
+
+    key = get_schema_cache_key(page_id, revision_id)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    lock_key = key + ':lock'
+    lock_timeout = getattr(settings, 'WAGTAILSTREAMFIELDFORMS_SCHEMA_CACHE_LOCK_TIMEOUT', 30)
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            data = compile_schema()
+            set_cached_schema(page_id, revision_id, data)
+        finally:
+            cache.delete(lock_key)
+        return data
+
+    deadline = time.monotonic() + getattr(settings, 'WAGTAILSTREAMFIELDFORMS_SCHEMA_CACHE_WAIT', 2)
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        data = cache.get(key)
+        if data is not None:
+            return data
+        if cache.get(lock_key) is None:
+            break
+    return compile_schema()
@@ -0,0 +1,34 @@
+from wagtail.core.signals import page_published, page_unpublished
+
+from .cache import find_page_form, invalidate_page
+
+
+def clear_form_class_cache(sender, instance, **kwargs):
+    '''Removes cached form classes for a page when its live content changes.'''
+    invalidate_page(instance.pk)
+
+
+def update_form_page(sender, instance, **kwargs):
+    '''Compiles the form schema and form class of a form page when it is published.
+
+    The PageForm of the previous revision is used so only the fields that
+    changed in the published revision are created again.
+    '''
+    from .models import AbstractFormPage
+    previous_page_form = find_page_form(instance.pk)
+    invalidate_page(instance.pk)
+    if isinstance(instance, AbstractFormPage):
+        instance.compile_form_schema()
+        instance.get_page_form(previous_page_form)
+
+
+def delete_form_schema(sender, instance, **kwargs):
+    '''Removes the compiled form schema of a page when it is unpublished.'''
+    from .models import FormSchema
+    FormSchema.objects.filter(page_id=instance.pk).delete()
+
+
+def register_signal_handlers():
+    page_published.connect(update_form_page)
+    page_unpublished.connect(clear_form_class_cache)
+    page_unpublished.connect(delete_form_schema)
@@ -0,0 +1,184 @@
+/*
+ * Client side validation for StreamField forms.
+ *
+ * Forms with a data-validation-rules attribute naming the id of the JSON
+ * rendered by the form_validation_rules template tag are checked before they
+ * are submitted. Invalid fields are reported with the browser's constraint
+ * validation API so no request is sent until they are fixed. Fields whose
+ * condition is not met are hidden and not validated.
+ */
+(function () {
+    'use strict';
+
+    var MESSAGES = {
+        required: 'This field is required.',
+        max_length: 'Ensure this value has at most %(limit)s characters.',
+        invalid_choice: 'Select a valid choice.',
+        email: 'Enter a valid email address.',
+        url: 'Enter a valid URL.',
+        number: 'Enter a number.',
+        date: 'Enter a valid date.',
+        datetime: 'Enter a valid date/time.'
+    };
+
+    var FORMATS = {
+        email: function (value) { return /^[^\s@]+@[^\s@]+$/.test(value); },
+        url: function (value) { return /^\S+$/.test(value) && (value.indexOf('.') !== -1 || value.indexOf('://') !== -1); },
+        number: function (value) { return /^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$/.test(value); },
+        date: function (value) { return !isNaN(Date.parse(value)); },
+        datetime: function (value) { return !isNaN(Date.parse(value)); }
+    };
+
+    function getElements(form, name) {
+        var elements = form.elements[name];
+        if (!elements) {
+            return [];
+        }
+        return elements.length !== undefined && !elements.tagName ? Array.prototype.slice.call(elements) : [elements];
+    }
+
+    function getValues(elements) {
+        var values = [];
+        elements.forEach(function (element) {
+            if (element.type === 'checkbox' || element.type === 'radio') {
+                if (element.checked) {
+                    values.push(element.value);
+                }
+            } else if (element.tagName === 'SELECT') {
+                Array.prototype.forEach.call(element.options, function (option) {
+                    if (option.selected) {
+                        values.push(option.value);
+                    }
+                });
+            } else if (element.value !== '') {
+                values.push(element.value);
+            }
+        });
+        return values;
+    }
+
+    function conditionMet(form, condition) {
+        var elements = getElements(form, condition.field);
+        var expected = condition.value;
+        if (elements.length === 1 && elements[0].type === 'checkbox') {
+            if (expected === '') {
+                return elements[0].checked;
+            }
+            return (elements[0].checked ? 'true' : 'false') === expected.toLowerCase();
+        }
+        var values = getValues(elements);
+        if (expected === '') {
+            return values.length > 0;
+        }
+        return values.indexOf(expected) !== -1;
+    }
+
+    function isActive(form, rules, name) {
+        var condition = rules[name] && rules[name].condition;
+        if (!condition) {
+            return true;
+        }
+        if (condition.met !== undefined) {
+            // the field it depends on belongs to another step of the form
+            return condition.met;
+        }
+        return isActive(form, rules, condition.field) && conditionMet(form, condition);
+    }
+
+    function updateVisibility(form, rules) {
+        Object.keys(rules).forEach(function (name) {
+            if (!rules[name].condition) {
+                return;
+            }
+            var active = isActive(form, rules, name);
+            getElements(form, name).forEach(function (element) {
+                var wrapper = element.closest('div') || element;
+                wrapper.hidden = !active;
+            });
+        });
+    }
+
+    function validateField(rules, values) {
+        if (!values.length) {
+            return rules.required ? MESSAGES.required : '';
+        }
+        for (var i = 0; i < values.length; i++) {
+            var value = values[i];
+            if (rules.max_length !== undefined && value.length > rules.max_length) {
+                return MESSAGES.max_length.replace('%(limit)s', rules.max_length);
+            }
+            if (rules.format && FORMATS[rules.format] && !FORMATS[rules.format](value)) {
+                return MESSAGES[rules.format];
+            }
+            if (rules.choices && rules.choices.indexOf(value) === -1) {
+                return MESSAGES.invalid_choice;
+            }
+        }
+        return '';
+    }
+
+    function validateForm(form, rules) {
+        var valid = true;
+        Object.keys(rules).forEach(function (name) {
+            var elements = getElements(form, name);
+            if (!elements.length) {
+                return;
+            }
+            if (!isActive(form, rules, name)) {
+                elements.forEach(function (element) {
+                    element.setCustomValidity('');
+                });
+                return;
+            }
+            var message = validateField(rules[name], getValues(elements));
+            elements.forEach(function (element) {
+                element.setCustomValidity(message);
+            });
+            if (message && valid) {
+                elements[0].reportValidity();
+                valid = false;
+            }
+        });
+        return valid;
+    }
+
+    function attach(form, rules) {
+        form.noValidate = true;
+        form.addEventListener('submit', function (event) {
+            if (!validateForm(form, rules)) {
+                event.preventDefault();
+            }
+        });
+        updateVisibility(form, rules);
+        form.addEventListener('change', function () {
+            updateVisibility(form, rules);
+        });
+        form.addEventListener('input', function (event) {
+            updateVisibility(form, rules);
+            if (event.target.name && rules[event.target.name]) {
+                getElements(form, event.target.name).forEach(function (element) {
+                    element.setCustomValidity('');
+                });
+            }
+        });
+    }
+
+    function init() {
+        Array.prototype.forEach.call(document.querySelectorAll('form[data-validation-rules]'), function (form) {
+            var script = document.getElementById(form.getAttribute('data-validation-rules'));
+            if (script) {
+                attach(form, JSON.parse(script.textContent));
+            }
+        });
+    }
+
+    window.WagtailStreamFieldForms = window.WagtailStreamFieldForms || {};
+    window.WagtailStreamFieldForms.validateField = validateField;
+    window.WagtailStreamFieldForms.attachValidation = attach;
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+}());
@@ -1,4 +1,5 @@
 from django import template
+from django.utils.html import json_script
 
 register = template.Library()
 
@@ -6,3 +7,21 @@ register = template.Library()
 @register.filter(name="unslugify")
 def unslugify(value):
     return str(value).replace('-', ' ').capitalize()
+
+
+@register.simple_tag
+def get_form_field(block, form):
+    '''Returns the bound field of form for a StreamField child holding a form field block.
+
+    Usage: {% get_form_field block form as field %}
+    '''
+    return form.get_block_field(block)
+
+
+@register.simple_tag
+def form_validation_rules(form, element_id):
+    '''Renders the client side validation rules of form as JSON for wagtailstreamfieldforms/js/validation.js.
+
+    Usage: {% form_validation_rules form "contact-rules" %}
+    '''
+    return json_script(form.validation_rules, element_id)
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 
@@ -16,6 +18,18 @@ FORM_FIELD_CHOICES = (
 )
 
 
-def create_field_id(label):
-    '''Converts a label to a slugified version we can use to identify the field.'''
+FIELD_ID_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=FIELD_ID_CACHE_SIZE)
+def _slugify_label(label):
     return str(slugify(label))
+
+
+def create_field_id(label):
+    '''Converts a label to a slugified version we can use to identify the field.
+
+    Results are memoized in a bounded cache because the same labels are
+    slugified on every request.
+    '''
+    return _slugify_label(str(label))
@@ -1,12 +1,21 @@
+import json
+
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from django.db.models import Count
+from django.http import Http404, JsonResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import redirect
 from django.urls import reverse
-from django.views.generic import ListView
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.cache import never_cache
+from django.views.generic import ListView, View
 
 from wagtail.core.models import Page
 
-from .models import Submission
+from .choices import choicesources
+from .models import AbstractFormPage, Submission
 
 
 class FormsListView(ListView):
@@ -68,3 +77,98 @@ class FormSubmissionsListView(ListView):
         data['rows'] = data_rows
 
         return data
+
+
+@never_cache
+def csrf_token(request):
+    '''Returns the CSRF token for forms on pages that were cached with the token placeholder.'''
+    return JsonResponse({'csrfToken': get_token(request)})
+
+
+class FormPageMixin(object):
+    '''Finds the live form page for the page_id URL argument and checks its view restrictions.'''
+
+    def get_page(self):
+        try:
+            page = Page.objects.live().get(pk=self.kwargs['page_id']).specific
+        except Page.DoesNotExist:
+            raise Http404()
+        if not isinstance(page, AbstractFormPage):
+            raise Http404()
+        for restriction in page.get_view_restrictions():
+            if not restriction.accept_request(self.request):
+                raise PermissionDenied()
+        return page
+
+
+class FormSchemaView(FormPageMixin, View):
+    '''Returns the fields of the form on a page as JSON.
+
+    The ETag is the content hash of the form class so unchanged forms are
+    answered with 304 Not Modified without describing the fields again.
+    Forms with choices loaded from a choice source are always described.
+    '''
+
+    def get(self, request, *args, **kwargs):
+        page = self.get_page()
+        form_class = page.get_form_class()
+        if page.uses_choice_sources():
+            return JsonResponse(page.get_form_builder().get_json_schema(form_class))
+        etag = quote_etag(form_class.content_hash)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(page.get_form_builder().get_json_schema(form_class))
+        response['ETag'] = etag
+        return response
+
+
+class FormSubmissionView(FormPageMixin, View):
+    '''Validates and stores a JSON object of form data posted to a page.
+
+    Field errors are returned with status 400 in the format of
+    ErrorDict.get_json_data.
+    '''
+
+    def post(self, request, *args, **kwargs):
+        page = self.get_page()
+        try:
+            data = json.loads(request.body.decode(request.encoding or 'utf-8'))
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return JsonResponse({
+                'errors': {'__all__': [{'message': 'Expected a JSON object.', 'code': 'invalid'}]},
+            }, status=400)
+
+        form = page.get_form(data, None, page=page, user=request.user)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+        page.process_form_submission(form)
+        return JsonResponse({'success': True}, status=201)
+
+
+class ChoiceSourceView(View):
+    '''Returns a page of the choices of a registered choice source as JSON.
+
+    The q parameter filters the choices by label and the page parameter
+    selects the page of WAGTAILSTREAMFIELDFORMS_CHOICE_PAGE_SIZE choices.
+    Only sources that allow autocompletion can be searched.
+    '''
+
+    def get(self, request, *args, **kwargs):
+        try:
+            source = choicesources.lookup(self.kwargs['name'])
+        except KeyError:
+            raise Http404()
+        if not source.autocomplete:
+            raise Http404()
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        page_size = getattr(settings, 'WAGTAILSTREAMFIELDFORMS_CHOICE_PAGE_SIZE', 20)
+        choices, more = source.search(request.GET.get('q', ''), (page - 1) * page_size, page_size)
+        return JsonResponse({
+            'results': [{'value': key, 'label': label} for key, label in choices],
+            'more': more,
+        })
@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections
+
+from wagtail.core.models import Page
+
+from . import schema
+from .models import AbstractFormPage
+
+
+def get_live_form_pages():
+    '''Returns a queryset of all live pages whose specific class inherits from AbstractFormPage.'''
+    return Page.objects.live().type(AbstractFormPage).specific().order_by('path')
+
+
+def compile_page_schema(page_id):
+    '''Compiles the form field specs of a page and returns them with the page id.
+
+    Used as the worker function of the process pool so it only returns plain data.
+    '''
+    page = Page.objects.get(pk=page_id).specific
+    return page_id, schema.compile_form_fields(page.get_form_fields())
+
+
+def warm_form_pages(workers=1, close_connections=False):
+    '''Compiles and caches the form of every live form page.
+
+    The compiled schemas are stored in the FormSchema model and the shared
+    schema cache if it is enabled, and the form classes are added to the form
+    class cache of the current process. Compiling is spread over a pool of
+    worker processes when workers is greater than one.
+
+    Pass close_connections=True when calling this before forking, e.g. from
+    the when_ready hook of gunicorn with preload_app enabled, so the forked
+    children do not share the database connections of the parent.
+
+    Returns the number of pages that were warmed.
+    '''
+    pages = {page.pk: page for page in get_live_form_pages()}
+
+    if workers > 1 and len(pages) > 1:
+        # child processes must open their own database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+            results = list(executor.map(compile_page_schema, pages.keys()))
+    else:
+        results = [(page_id, schema.compile_form_fields(page.get_form_fields())) for page_id, page in pages.items()]
+
+    for page_id, specs in results:
+        page = pages[page_id]
+        page.save_form_schema(specs)
+        page.get_form_class()
+
+    if close_connections:
+        connections.close_all()
+    return len(results)